@@ -1,6 +1,9 @@
 """
 Parse OPAL stdout (simname.out) for per-beam / per-container metadata printed by
 Beam::print and TrackRun::execute, then align rows with regression stat stems.
+
+The log is read line by line in a single pass (BeamLogScanner), which stops as
+soon as the TrackRun summary of every beam has been seen.
 """
 
 from __future__ import annotations
@@ -8,16 +11,50 @@ from __future__ import annotations
 import math
 import os
 import re
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
 # Electron rest energy [eV] (CODATA 2018)
 _ELECTRON_REST_EV = 510998.9461
 
 # OPAL-X prefixes each stdout line with a prompt; strip before matching Beam banners.
+_OPAL_PROMPT = "OPAL-X"
 _OPAL_PROMPT_RE = re.compile(r"^OPAL-X(?:\[\d+\])?>\s*")
 
+_BEAM_START_RE = re.compile(r"^\*\s+\*+\s+B\s+E\s+A\s+M\s+\*+")
+# Closing banner: "* " then only asterisks (and trailing whitespace) to EOL
+_BEAM_END_RE = re.compile(r"^\*\s+\*+\s*$")
+# Banner fields by their first word after "* "; only these patterns are tried on a line.
+_BEAM_FIELDS: dict[str, tuple[tuple[Any, str], ...]] = {
+    "BEAM": ((re.compile(r"^\*\s+BEAM\s+(\S+)\s*$"), "beam_name"),),
+    "PARTICLE": ((re.compile(r"^\*\s+PARTICLE\s+(\S+)\s*$"), "species"),),
+    "REST": ((re.compile(r"^\*\s+REST MASS\s+(\S+)\s+\[GeV\]\s*$"), "rest_mass_GeV"),),
+    "CHARGE": ((re.compile(r"^\*\s+CHARGE\s+(.+?)\s*$"), "charge_line"),),
+    "MOMENTUM": (
+        (re.compile(r"^\*\s+MOMENTUM\s+(.+?)\s+\[eV/c\]\s*$"), "momentum_eV_c"),
+        (re.compile(r"^\*\s+MOMENTUM\s+(.+?)\s+\[GeV/c\]\s*$"), "momentum_GeV_c"),
+    ),
+    "CURRENT": ((re.compile(r"^\*\s+CURRENT\s+(.+?)\s+\[A\]\s*$"), "beam_current_A"),),
+    "FREQUENCY": ((re.compile(r"^\*\s+FREQUENCY\s+(.+?)\s+\[MHz\]\s*$"), "rf_frequency_MHz"),),
+    "NPART": ((re.compile(r"^\*\s+NPART\s+(\S+)\s*$"), "n_macroparticles"),),
+}
+
+# TrackRun summary after the beams: macro charge, mass, particles per macro.
+_TRACKRUN_PREFIX = "* Beam["
+_TRACKRUN_RE = re.compile(
+    r"^\*\s+Beam\[(\d+)\]\s+\S+\s+"
+    r"(macro charge per particle \[C\]|macro mass per particle \[GeV/c\^2\]|particles per macro particle):"
+    r"\s*(.+?)\s*$"
+)
+_TRACKRUN_KEYS = {
+    "macro charge per particle [C]": "macro_charge_per_particle_C",
+    "macro mass per particle [GeV/c^2]": "macro_mass_GeV_c2",
+    "particles per macro particle": "particles_per_macroparticle",
+}
+
 
 def _strip_opal_prompt(line: str) -> str:
+    if not line.startswith(_OPAL_PROMPT):
+        return line
     m = _OPAL_PROMPT_RE.match(line)
     if m:
         return line[m.end() :]
@@ -28,94 +65,75 @@ def _strip_num(s: str) -> str:
     return s.strip()
 
 
+class BeamLogScanner:
+    """
+    Single-pass state machine over the lines of an OPAL-X log: Beam::print
+    banners (blocks) and the TrackRun summary (extras, by beam index).
+    feed() returns True once the TrackRun summary of every beam seen so far is
+    complete; with stop_early the caller can then stop reading.
+    """
+
+    def __init__(self, stop_early: bool = True):
+        self.blocks: list[dict[str, Any]] = []
+        self.extras: dict[int, dict[str, str]] = {}
+        self.stop_early = stop_early
+        self._cur: Optional[dict[str, Any]] = None
+
+    def done(self) -> bool:
+        if not self.stop_early or self._cur is not None or not self.blocks:
+            return False
+        return all(len(self.extras.get(i, ())) == len(_TRACKRUN_KEYS) for i in range(len(self.blocks)))
+
+    def feed(self, raw: str) -> bool:
+        line = _strip_opal_prompt(raw.rstrip("\r\n"))
+        # Everything of interest is a "* ..." line.
+        if not line.startswith("*"):
+            return False
+        cur = self._cur
+        if cur is not None:
+            if "beam_name" in cur and _BEAM_END_RE.match(line):
+                self.blocks.append(cur)
+                self._cur = None
+                return self.done()
+            parts = line[1:].split(None, 1)
+            for rx, key in _BEAM_FIELDS.get(parts[0] if parts else "", ()):
+                m = rx.match(line)
+                if m:
+                    cur[key] = m.group(1).strip() if key == "charge_line" else m.group(1)
+            return False
+        if line.startswith(_TRACKRUN_PREFIX):
+            m = _TRACKRUN_RE.match(line)
+            if m:
+                value = m.group(3).strip()
+                key = _TRACKRUN_KEYS[m.group(2)]
+                if key == "particles_per_macroparticle":
+                    value = value.split()[0]
+                self.extras.setdefault(int(m.group(1)), {})[key] = value
+                return self.done()
+            return False
+        if _BEAM_START_RE.match(line):
+            self._cur = {}
+        return False
+
+    def scan(self, lines: Iterable[str]) -> "BeamLogScanner":
+        for line in lines:
+            if self.feed(line):
+                break
+        return self
+
+
 def parse_beam_blocks(log_text: str) -> list[dict[str, Any]]:
     """
     Split log into Beam::print sections and extract banner fields.
     """
-    lines = log_text.splitlines()
-    blocks: list[dict[str, Any]] = []
-    i = 0
-    start_re = re.compile(r"^\*\s+\*+\s+B\s+E\s+A\s+M\s+\*+")
-    # Closing banner: "* " then only asterisks (and trailing whitespace) to EOL
-    end_re = re.compile(r"^\*\s+\*+\s*$")
-
-    while i < len(lines):
-        raw = lines[i]
-        norm = _strip_opal_prompt(raw)
-        if start_re.match(norm):
-            i += 1
-            cur: dict[str, Any] = {}
-            while i < len(lines):
-                norm_i = _strip_opal_prompt(lines[i])
-                if end_re.match(norm_i) and "beam_name" in cur:
-                    blocks.append(cur)
-                    i += 1
-                    break
-                line = norm_i
-                m = re.match(r"^\*\s+BEAM\s+(\S+)\s*$", line)
-                if m:
-                    cur["beam_name"] = m.group(1)
-                m = re.match(r"^\*\s+PARTICLE\s+(\S+)\s*$", line)
-                if m:
-                    cur["species"] = m.group(1)
-                m = re.match(r"^\*\s+REST MASS\s+(\S+)\s+\[GeV\]\s*$", line)
-                if m:
-                    cur["rest_mass_GeV"] = m.group(1)
-                m = re.match(r"^\*\s+CHARGE\s+(.+?)\s*$", line)
-                if m:
-                    cur["charge_line"] = m.group(1).strip()
-                m = re.match(r"^\*\s+MOMENTUM\s+(.+?)\s+\[eV/c\]\s*$", line)
-                if m:
-                    cur["momentum_eV_c"] = _strip_num(m.group(1))
-                m = re.match(r"^\*\s+MOMENTUM\s+(.+?)\s+\[GeV/c\]\s*$", line)
-                if m:
-                    cur["momentum_GeV_c"] = _strip_num(m.group(1))
-                m = re.match(r"^\*\s+CURRENT\s+(.+?)\s+\[A\]\s*$", line)
-                if m:
-                    cur["beam_current_A"] = _strip_num(m.group(1))
-                m = re.match(r"^\*\s+FREQUENCY\s+(.+?)\s+\[MHz\]\s*$", line)
-                if m:
-                    cur["rf_frequency_MHz"] = _strip_num(m.group(1))
-                m = re.match(r"^\*\s+NPART\s+(\S+)\s*$", line)
-                if m:
-                    cur["n_macroparticles"] = m.group(1)
-                i += 1
-            continue
-        i += 1
-    return blocks
+    return BeamLogScanner(stop_early=False).scan(log_text.splitlines()).blocks
 
 
 def parse_trackrun_extras(log_text: str) -> dict[int, dict[str, str]]:
     """
     Lines from TrackRun after each beam: macro charge, mass, particles per macro.
     """
-    out: dict[int, dict[str, str]] = {}
-    pat_charge = re.compile(
-        r"^\*\s+Beam\[(\d+)\]\s+\S+\s+macro charge per particle \[C\]:\s*(.+?)\s*$"
-    )
-    pat_mass = re.compile(
-        r"^\*\s+Beam\[(\d+)\]\s+\S+\s+macro mass per particle \[GeV/c\^2\]:\s*(.+?)\s*$"
-    )
-    pat_ratio = re.compile(
-        r"^\*\s+Beam\[(\d+)\]\s+\S+\s+particles per macro particle:\s*(\S+)\s*$"
-    )
-    for line in log_text.splitlines():
-        line = _strip_opal_prompt(line)
-        m = pat_charge.match(line)
-        if m:
-            idx = int(m.group(1))
-            out.setdefault(idx, {})["macro_charge_per_particle_C"] = m.group(2).strip()
-            continue
-        m = pat_mass.match(line)
-        if m:
-            idx = int(m.group(1))
-            out.setdefault(idx, {})["macro_mass_GeV_c2"] = m.group(2).strip()
-            continue
-        m = pat_ratio.match(line)
-        if m:
-            idx = int(m.group(1))
-            out.setdefault(idx, {})["particles_per_macroparticle"] = m.group(2).strip()
-    return out
+    return BeamLogScanner(stop_early=False).scan(log_text.splitlines()).extras
 
 
 def _starting_energy_gev(species: str, p_evc_str: str, rest_mass_gev_str: Optional[str]) -> str:
@@ -201,11 +219,16 @@ def build_beam_containers_json(
     """
     Full pipeline: parse log, merge TrackRun extras, attach stems, normalize keys for JSON.
     """
-    blocks = parse_beam_blocks(log_text)
+    return _containers_json(BeamLogScanner().scan(log_text.splitlines()), stat_stems, simname)
+
+
+def _containers_json(
+    scanner: BeamLogScanner, stat_stems: list[str], simname: str
+) -> tuple[list[dict[str, Any]], Optional[str]]:
+    blocks = scanner.blocks
     if not blocks:
         return [], None
-    extras = parse_trackrun_extras(log_text)
-    merged = merge_beam_metadata(blocks, extras)
+    merged = merge_beam_metadata(blocks, scanner.extras)
     rows, warn = attach_stat_stems(merged, stat_stems, simname)
     json_rows: list[dict[str, Any]] = []
     for r in rows:
@@ -236,8 +259,9 @@ def load_beam_containers_from_out(
     if not out_path or not os.path.isfile(out_path):
         return [], None
     try:
+        # Streamed: the beam summary is near the top of logs that can be hundreds of MB.
         with open(out_path, "r", encoding="utf-8", errors="replace") as f:
-            text = f.read()
+            scanner = BeamLogScanner().scan(f)
     except OSError:
         return [], None
-    return build_beam_containers_json(text, stat_stems, simname)
+    return _containers_json(scanner, stat_stems, simname)
@@ -0,0 +1,120 @@
+"""
+Statistics of repeated simulation runs (run-reg-tests.py --benchmark).
+
+In benchmark mode every selected test runs a few unmeasured warm-up times and
+then N measured repetitions; only the first repetition is compared with the
+references. The wall time and the OPALX timers (see timings.py) of the measured
+repetitions are summarised by median, quartiles and a percentile bootstrap
+confidence interval of the median, stored per simulation as results.json
+"benchmark":
+
+    {"repeats": 5, "warmup": 1, "failed": 0, "confidence": 0.95,
+     "wall_s": {"n": 5, "median": 19.4, "q1": 19.3, "q3": 19.6, "iqr": 0.3,
+                "ci": [19.2, 19.7], "min": 19.1, "max": 20.2, "samples": [...]},
+     "timers": [{"name": "mainTimer", "n": 5, "median": ..., ...}, ...]}
+
+The bootstrap uses a fixed seed, so the same samples always give the same
+interval. With few repetitions the interval is coarse (it can only end on
+observed values); it still tells a noisy test from a stable one.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Callable, Optional
+
+from OpalRegressionTests import timings
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_RESAMPLES = 2000
+_SEED = 20260101
+
+
+def quantile(values: list[float], q: float) -> float:
+    """
+    Quantile (q in [0, 1]) of a non-empty list, linear between order statistics.
+    """
+    ordered = sorted(values)
+    pos = q * (len(ordered) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def median(values: list[float]) -> float:
+    return quantile(values, 0.5)
+
+
+def bootstrap_ci(
+    values: list[float],
+    statistic: Callable[[list[float]], float] = median,
+    confidence: float = DEFAULT_CONFIDENCE,
+    resamples: int = DEFAULT_RESAMPLES,
+    seed: int = _SEED,
+) -> tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval of statistic(values).
+    """
+    if len(values) < 2:
+        return values[0], values[0]
+    rng = random.Random(seed)
+    n = len(values)
+    estimates = [statistic([values[rng.randrange(n)] for _ in range(n)]) for _ in range(resamples)]
+    alpha = (1.0 - confidence) / 2.0
+    return quantile(estimates, alpha), quantile(estimates, 1.0 - alpha)
+
+
+def summarize(
+    values: list[float],
+    confidence: float = DEFAULT_CONFIDENCE,
+    resamples: int = DEFAULT_RESAMPLES,
+) -> dict:
+    """
+    {"n", "median", "q1", "q3", "iqr", "ci", "min", "max", "samples"} of a non-empty list.
+    """
+    q1 = quantile(values, 0.25)
+    q3 = quantile(values, 0.75)
+    lo, hi = bootstrap_ci(values, confidence=confidence, resamples=resamples)
+    return {
+        "n": len(values),
+        "median": round(median(values), 4),
+        "q1": round(q1, 4),
+        "q3": round(q3, 4),
+        "iqr": round(q3 - q1, 4),
+        "ci": [round(lo, 4), round(hi, 4)],
+        "min": round(min(values), 4),
+        "max": round(max(values), 4),
+        "samples": [round(v, 4) for v in values],
+    }
+
+
+def summarize_repetitions(
+    repetitions: list[dict],
+    requested: int,
+    warmup: int = 0,
+    confidence: float = DEFAULT_CONFIDENCE,
+) -> Optional[dict]:
+    """
+    results.json "benchmark" record from the measured repetitions of one test,
+    each {"wall_s": float, "timings": timings record or None}, in run order.
+    Failed or timed-out repetitions are left out by the caller and counted
+    as requested - len(repetitions). None if no repetition succeeded.
+    """
+    walls = [r["wall_s"] for r in repetitions if isinstance(r.get("wall_s"), (int, float))]
+    if not walls:
+        return None
+    # Timers in the order OPALX prints them; a timer may be missing in some repetitions.
+    per_timer: dict[str, list[float]] = {}
+    for r in repetitions:
+        for t in ((r.get("timings") or {}).get("timers") or []):
+            value = timings.wall(t)
+            if t.get("name") and isinstance(value, (int, float)):
+                per_timer.setdefault(t["name"], []).append(value)
+    return {
+        "repeats": requested,
+        "warmup": warmup,
+        "failed": requested - len(repetitions),
+        "confidence": confidence,
+        "wall_s": summarize(walls, confidence=confidence),
+        "timers": [dict(name=name, **summarize(v, confidence=confidence)) for name, v in per_timer.items()],
+    }
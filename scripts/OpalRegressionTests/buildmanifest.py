@@ -0,0 +1,250 @@
+"""
+Per-run build manifest (runs/<timestamp>/build-manifest.json) of build_report.
+
+For every simulation the manifest records the files its evaluation read (raw
+stat files and log, reference files, the .rt file) with size, mtime and a
+content hash, plus a key over those hashes, EVAL_VERSION and the plot
+settings. Run-level entries cover run-meta.json, the unit test summary and
+the results.json and index.html that were written, with sitegen's
+RUN_PAGE_VERSION, and the files the page loads (plots/ and fragments/).
+
+A later build reads only the manifest and stats the recorded files: a run is
+up to date when nothing changed, and otherwise only the simulations whose key
+differs are evaluated again. Files whose size or mtime changed are hashed, so a
+copied or touched file with the same content does not count as a change. A
+deleted plot or page fragment sends the run back through the full checks, which
+render it again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Iterable, Optional
+
+from OpalRegressionTests.plotting import PLOT_STYLE_VERSION
+from OpalRegressionTests.sitegen import FRAGMENTS_DIRNAME, RUN_PAGE_VERSION
+
+MANIFEST_FILENAME = "build-manifest.json"
+_MANIFEST_VERSION = 2
+# Bump whenever a simulation is evaluated differently (checks, results.json
+# fields, beam metadata), to re-evaluate every recorded run.
+EVAL_VERSION = 2
+_RUN_INPUTS = ("run-meta.json", "unit-tests-summary.json")
+
+# Outcomes of check().
+COMPLETE = "complete"
+STALE_SIMULATIONS = "stale_simulations"
+STALE_PAGE = "stale_page"
+
+
+def manifest_path(run_dir: str) -> str:
+    return os.path.join(run_dir, MANIFEST_FILENAME)
+
+
+def load(run_dir: str) -> Optional[dict]:
+    try:
+        with open(manifest_path(run_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != _MANIFEST_VERSION:
+        return None
+    return data
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(path: str, previous: Optional[dict] = None) -> Optional[dict]:
+    """
+    {"size", "mtime_ns", "blake2b"} of path, or None if it does not exist.
+    The hash of previous is reused while size and mtime are unchanged.
+    """
+    try:
+        st = os.stat(path)
+        if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+            return previous
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "blake2b": _hash_file(path)}
+    except OSError:
+        return None
+
+
+def _changed(path: str, stamp: Optional[dict]) -> bool:
+    current = fingerprint(path, stamp)
+    if current is None or stamp is None:
+        return current != stamp
+    return current["blake2b"] != stamp.get("blake2b")
+
+
+def _output_stamp(run_dir: str, name: str) -> Optional[list]:
+    # Written by build_report itself: size and mtime are enough.
+    try:
+        st = os.stat(os.path.join(run_dir, name))
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _list_files(run_dir: str, subdir: str) -> list[str]:
+    try:
+        names = sorted(os.listdir(os.path.join(run_dir, subdir)))
+    except OSError:
+        return []
+    return [f"{subdir}/{n}" for n in names if os.path.isfile(os.path.join(run_dir, subdir, n))]
+
+
+def _artifacts(run_dir: str) -> dict:
+    """
+    Run-relative paths of the files the page loads: the plots linked from
+    results.json with the plots/<simname>/manifest.json of every simulation,
+    and the simulation fragments.
+    """
+    plots = set()
+    try:
+        with open(os.path.join(run_dir, "results.json"), "r", encoding="utf-8") as f:
+            results = json.load(f)
+    except (OSError, ValueError):
+        results = {}
+    for sim in results.get("simulations") or []:
+        for t in sim.get("tests") or []:
+            for key in ("plot", "plot_data"):
+                if t.get(key):
+                    plots.add(t[key])
+    try:
+        sim_dirs = sorted(os.listdir(os.path.join(run_dir, "plots")))
+    except OSError:
+        sim_dirs = []
+    for name in sim_dirs:
+        if os.path.isfile(os.path.join(run_dir, "plots", name, "manifest.json")):
+            plots.add(f"plots/{name}/manifest.json")
+    return {"plots": sorted(plots), "fragments": _list_files(run_dir, FRAGMENTS_DIRNAME)}
+
+
+def _missing(run_dir: str, relpaths: Iterable[str]) -> bool:
+    return any(not os.path.isfile(os.path.join(run_dir, p)) for p in relpaths)
+
+
+def _settings(generate_plots: bool, plot_mode: str) -> dict:
+    return {
+        "eval_version": EVAL_VERSION,
+        "plots": bool(generate_plots),
+        "plot_mode": plot_mode,
+        "plot_style": PLOT_STYLE_VERSION,
+    }
+
+
+def simulation_inputs(simname: str, sim_raw_dir: str, ref_dir: str, rt_path: str) -> list[str]:
+    """
+    Files the evaluation of one simulation reads: the .rt file, every reference
+    file, its counterpart in raw/<simname>/ and the simulation log.
+    """
+    paths = [rt_path]
+    try:
+        ref_names = sorted(n for n in os.listdir(ref_dir) if os.path.isfile(os.path.join(ref_dir, n)))
+    except OSError:
+        ref_names = []
+    for name in ref_names:
+        paths.append(os.path.join(ref_dir, name))
+        paths.append(os.path.join(sim_raw_dir, name))
+    paths.append(os.path.join(sim_raw_dir, f"{simname}.out"))
+    paths.append(os.path.join(sim_raw_dir, f"{simname}-RT.o"))
+    return paths
+
+
+def simulation_entry(
+    paths: Iterable[str],
+    generate_plots: bool,
+    plot_mode: str,
+    previous: Optional[dict] = None,
+) -> dict:
+    """
+    Manifest entry {"key", "inputs"} of one simulation. Missing files are part
+    of the key too, so a file that appears or disappears is a change.
+    """
+    old_inputs = (previous or {}).get("inputs") or {}
+    inputs = {path: fingerprint(path, old_inputs.get(path)) for path in paths}
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps(_settings(generate_plots, plot_mode), sort_keys=True).encode("utf-8"))
+    for path, stamp in inputs.items():
+        # Keyed by file name: the key survives moving the run or the tests tree.
+        h.update(os.path.basename(path).encode("utf-8") + b"\0")
+        h.update((stamp["blake2b"] if stamp else "-").encode("ascii") + b"\0")
+    return {"key": h.hexdigest(), "inputs": inputs}
+
+
+def save(
+    run_dir: str,
+    simulations: dict,
+    generate_plots: bool,
+    plot_mode: str,
+) -> None:
+    """
+    Write the manifest after results.json and index.html of the run were written.
+    """
+    previous = load(run_dir) or {}
+    old_run_inputs = previous.get("run_inputs") or {}
+    run_inputs = {}
+    for name in _RUN_INPUTS:
+        path = os.path.join(run_dir, name)
+        run_inputs[name] = fingerprint(path, old_run_inputs.get(name))
+    outputs = {name: _output_stamp(run_dir, name) for name in ("results.json", "index.html")}
+    data = {
+        "version": _MANIFEST_VERSION,
+        "settings": _settings(generate_plots, plot_mode),
+        "page_version": RUN_PAGE_VERSION,
+        "run_inputs": run_inputs,
+        "outputs": outputs,
+        "artifacts": _artifacts(run_dir),
+        "simulations": simulations,
+    }
+    path = manifest_path(run_dir)
+    tmp = path + ".tmp.%d" % os.getpid()
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def check(run_dir: str, manifest: dict, generate_plots: bool, plot_mode: str) -> Optional[str]:
+    """
+    COMPLETE, STALE_SIMULATIONS (some simulation inputs changed), STALE_PAGE
+    (only the page is out of date), or None if the manifest cannot tell
+    (other plot settings, results.json changed by someone else, plots missing).
+    """
+    settings = manifest.get("settings") or {}
+    current = _settings(generate_plots, plot_mode)
+    if settings.get("plots") != current["plots"] or settings.get("plot_mode") != current["plot_mode"]:
+        return None
+    if settings != current:
+        return STALE_SIMULATIONS
+    outputs = manifest.get("outputs") or {}
+    if _output_stamp(run_dir, "results.json") != outputs.get("results.json"):
+        return None
+    artifacts = manifest.get("artifacts") or {}
+    if _missing(run_dir, artifacts.get("plots") or []):
+        # build_report finds the broken plot links and renders them again.
+        return None
+    for sim in (manifest.get("simulations") or {}).values():
+        for path, stamp in (sim.get("inputs") or {}).items():
+            if _changed(path, stamp):
+                return STALE_SIMULATIONS
+    for name, stamp in (manifest.get("run_inputs") or {}).items():
+        # Build info and unit test summary are only read when results.json is assembled.
+        if _changed(os.path.join(run_dir, name), stamp):
+            return STALE_SIMULATIONS
+    if manifest.get("page_version") != RUN_PAGE_VERSION:
+        return STALE_PAGE
+    if outputs.get("index.html") is None or _output_stamp(run_dir, "index.html") != outputs["index.html"]:
+        return STALE_PAGE
+    if _missing(run_dir, artifacts.get("fragments") or []):
+        return STALE_PAGE
+    return COMPLETE
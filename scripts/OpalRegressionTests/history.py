@@ -0,0 +1,202 @@
+"""
+Per-test runtime history from previous runs, used to launch the longest tests
+first and to derive per-test timeouts from their p95 runtime.
+
+Durations are read from runs/*/results.json and runs_remote/*/results.json.
+A small index (runs/.duration-index.json) keeps the extracted numbers per run,
+validated by the results.json mtime, so only new runs are parsed.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+from typing import Optional
+
+INDEX_FILENAME = ".duration-index.json"
+_INDEX_VERSION = 1
+_CONFIG_KEYS = ("Device", "Kokkos Architecture", "Build Type")
+
+
+def config_key(build_info: Optional[dict]) -> str:
+    """
+    Build configuration identity used to compare runtimes (Device / Kokkos Architecture / Build Type).
+    """
+    info = build_info or {}
+    return " · ".join(str(info.get(k) or "-") for k in _CONFIG_KEYS)
+
+
+def _extract_run(results: dict) -> dict:
+    tests = {}
+    for sim in results.get("simulations", []):
+        name = sim.get("name")
+        if not name:
+            continue
+        res = sim.get("resources") or {}
+        wall = res.get("wall_s")
+        failed = any(t.get("state") in ("failed", "broken") for t in sim.get("tests", []))
+        tests[name] = {
+            "wall_s": (float(wall) if isinstance(wall, (int, float)) else None),
+            "timed_out": bool(res.get("timed_out")),
+            "failed": failed,
+        }
+    return {
+        "config": config_key((results.get("build") or {}).get("info")),
+        "tests": tests,
+    }
+
+
+def _load_index(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == _INDEX_VERSION and isinstance(data.get("runs"), dict):
+            return data
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": _INDEX_VERSION, "runs": {}}
+
+
+def load_history(
+    nightlybuildx_dir: str,
+    max_runs: Optional[int] = 30,
+    before: Optional[str] = None,
+) -> list[dict]:
+    """
+    Return up to max_runs (None = all) most recent runs, newest first, as
+    {"run": name, "config": str, "tests": {simname: {"wall_s", "timed_out", "failed"}}}.
+    With before, only runs whose timestamp name sorts before it are returned.
+    """
+    runs_root = os.path.join(nightlybuildx_dir, "runs")
+    index_path = os.path.join(runs_root, INDEX_FILENAME)
+    index = _load_index(index_path)
+    entries = []
+    for sub in ("runs", "runs_remote"):
+        base = os.path.join(nightlybuildx_dir, sub)
+        try:
+            names = os.listdir(base)
+        except OSError:
+            continue
+        for name in names:
+            rpath = os.path.join(base, name, "results.json")
+            try:
+                mtime = os.path.getmtime(rpath)
+            except OSError:
+                continue
+            entries.append((name, sub, rpath, mtime))
+    # Run directories are named by timestamp; newest first.
+    entries.sort(key=lambda e: e[0], reverse=True)
+    existing = {sub + "/" + name for name, sub, _rpath, _mtime in entries}
+    if before is not None:
+        entries = [e for e in entries if e[0] < before]
+    if max_runs is not None:
+        entries = entries[:max_runs]
+
+    changed = False
+    out = []
+    for name, sub, rpath, mtime in entries:
+        key = sub + "/" + name
+        cached = index["runs"].get(key)
+        if cached is None or cached.get("mtime") != mtime:
+            try:
+                with open(rpath, "r", encoding="utf-8") as f:
+                    results = json.load(f)
+            except (OSError, ValueError):
+                continue
+            cached = dict(_extract_run(results), mtime=mtime)
+            index["runs"][key] = cached
+            changed = True
+        out.append({"run": name, "config": cached.get("config", ""), "tests": cached.get("tests", {})})
+
+    stale = [k for k in index["runs"] if k not in existing]
+    for k in stale:
+        del index["runs"][k]
+    if changed or stale:
+        try:
+            os.makedirs(runs_root, exist_ok=True)
+            # Concurrent builds (build_report --jobs) may write the index at the same time.
+            tmp = index_path + ".tmp.%d" % os.getpid()
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(index, f, sort_keys=True)
+            os.replace(tmp, index_path)
+        except OSError:
+            pass
+    return out
+
+
+def durations(history: list[dict], simname: str, config: Optional[str] = None) -> list[float]:
+    """
+    Wall times of completed (not timed-out) executions of simname, newest first.
+    With config, only runs of that build configuration are considered.
+    """
+    out = []
+    for run in history:
+        if config is not None and run.get("config") != config:
+            continue
+        t = run["tests"].get(simname)
+        if not t or t.get("timed_out") or t.get("wall_s") is None:
+            continue
+        out.append(t["wall_s"])
+    return out
+
+
+def last_failed(history: list[dict], simname: str) -> bool:
+    """
+    True if the most recent run containing simname had a failed or broken check.
+    """
+    for run in history:
+        t = run["tests"].get(simname)
+        if t is not None:
+            return bool(t.get("failed"))
+    return False
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile (q in [0, 100]) of a non-empty list.
+    """
+    ordered = sorted(values)
+    rank = max(1, int(math.ceil(q / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def schedule_order(
+    tests: list[str],
+    history: list[dict],
+    config: Optional[str] = None,
+    failing_first: bool = False,
+) -> list[str]:
+    """
+    Longest expected runtime first (median of the same configuration, else of
+    any configuration); tests without history go first since they may be long.
+    With failing_first, tests that failed last time are moved to the front.
+    """
+    def expected(name):
+        d = durations(history, name, config) or durations(history, name)
+        if not d:
+            return math.inf
+        return sorted(d)[len(d) // 2]
+
+    keyed = []
+    for pos, name in enumerate(tests):
+        fail_rank = 0 if (failing_first and last_failed(history, name)) else 1
+        keyed.append((fail_rank, -expected(name), pos, name))
+    keyed.sort()
+    return [k[3] for k in keyed]
+
+
+def adaptive_timeout(
+    samples: list[float],
+    default: float,
+    factor: float = 3.0,
+    floor: float = 120.0,
+    min_samples: int = 3,
+) -> float:
+    """
+    factor * p95 of the historical runtimes, clamped to [floor, default].
+    Falls back to default without enough history (or with factor <= 0).
+    """
+    if factor <= 0 or len(samples) < min_samples:
+        return default
+    return min(default, max(floor, factor * percentile(samples, 95)))
@@ -0,0 +1,299 @@
+"""
+Launch a simulation and stream its output to disk while it runs.
+
+stdout and stderr are merged at the file-descriptor level (so lines keep their
+original interleaving), copied to the log file in bounded chunks and optionally
+echoed to the console through a line-rate limiter. The child runs in its own
+session; on timeout the whole process group (mpirun and all ranks) is killed.
+
+The child is reaped with os.wait4(), whose rusage covers the launcher script and
+every descendant it waited for (mpirun, ranks), so concurrently running tests
+do not pollute each other's numbers the way RUSAGE_CHILDREN deltas would.
+"""
+
+from __future__ import annotations
+
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from typing import IO, Optional
+
+_CHUNK_SIZE = 64 * 1024
+# A console line longer than this is echoed in pieces instead of being buffered.
+_MAX_PARTIAL_LINE = 64 * 1024
+_KILL_GRACE_S = 5.0
+
+
+class LineTee:
+    """
+    Echo complete lines to a text stream, at most `max_rate` lines per second
+    (token bucket with a one-second burst). Suppressed lines are counted and
+    reported once output slows down again; everything still ends up in the log.
+    """
+
+    def __init__(self, stream: IO[str], max_rate: float = 0.0):
+        self.stream = stream
+        self.max_rate = max_rate
+        self._partial = b""
+        self._tokens = max_rate
+        self._last = time.monotonic()
+        self._suppressed = 0
+
+    def _allow(self) -> bool:
+        if self.max_rate <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._last) * self.max_rate)
+        self._last = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    def _emit(self, line: bytes) -> None:
+        if not self._allow():
+            self._suppressed += 1
+            return
+        if self._suppressed:
+            self.stream.write("[... %d line(s) not echoed, see log ...]\n" % self._suppressed)
+            self._suppressed = 0
+        self.stream.write(line.decode("utf-8", errors="replace"))
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._emit(line + b"\n")
+        if len(self._partial) > _MAX_PARTIAL_LINE:
+            self._emit(self._partial + b"\n")
+            self._partial = b""
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self._partial:
+            self._emit(self._partial + b"\n")
+            self._partial = b""
+        if self._suppressed:
+            self.stream.write("[... %d line(s) not echoed, see log ...]\n" % self._suppressed)
+            self._suppressed = 0
+        self.stream.flush()
+
+
+class RunOutcome:
+    """
+    Result of run_streaming(): exit status, whether the timeout fired, and the
+    resources used by the child and its descendants.
+    """
+
+    def __init__(self, returncode: Optional[int], timed_out: bool, wall_s: float = 0.0):
+        self.returncode = returncode
+        self.timed_out = timed_out
+        self.wall_s = wall_s
+        self.user_s: Optional[float] = None
+        self.sys_s: Optional[float] = None
+        # Peak RSS of the largest single process (e.g. one MPI rank), in KiB.
+        self.max_rss_kb: Optional[int] = None
+        # /proc/<pid>/io counters (Linux only), including reaped descendants.
+        self.io: dict[str, int] = {}
+
+    def resources(self) -> dict:
+        """
+        JSON-friendly resource summary (keys with unknown values are omitted).
+        """
+        out: dict = {"wall_s": round(self.wall_s, 3)}
+        if self.user_s is not None:
+            out["user_s"] = round(self.user_s, 3)
+            out["sys_s"] = round(self.sys_s, 3)
+        if self.max_rss_kb is not None:
+            out["max_rss_kb"] = self.max_rss_kb
+        for key in ("read_bytes", "write_bytes", "rchar", "wchar"):
+            if key in self.io:
+                out[key] = self.io[key]
+        return out
+
+
+def _read_proc_io(pid: int) -> dict[str, int]:
+    try:
+        with open("/proc/%d/io" % pid, "r") as f:
+            text = f.read()
+    except OSError:
+        return {}
+    out = {}
+    for line in text.splitlines():
+        key, _sep, value = line.partition(":")
+        try:
+            out[key.strip()] = int(value)
+        except ValueError:
+            continue
+    return out
+
+
+class _Reaper:
+    """
+    Waits for the child with os.wait4() instead of Popen.wait() to keep its rusage.
+    Where os.waitid(WNOWAIT) exists, /proc/<pid>/io is read once more while the
+    child is a zombie: at that point it includes all descendants it reaped.
+    """
+
+    def __init__(self, proc: subprocess.Popen):
+        self.proc = proc
+        self.rusage = None
+        self.io: dict[str, int] = {}
+        self._last_io_sample = 0.0
+
+    def sample_io(self, min_interval: float = 0.5) -> None:
+        now = time.monotonic()
+        if now - self._last_io_sample < min_interval:
+            return
+        self._last_io_sample = now
+        io = _read_proc_io(self.proc.pid)
+        if io:
+            self.io = io
+
+    def _exited(self) -> bool:
+        pid = self.proc.pid
+        if hasattr(os, "waitid") and hasattr(os, "WNOWAIT"):
+            try:
+                if os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+                    return False
+            except ChildProcessError:
+                return True
+            io = _read_proc_io(pid)
+            if io:
+                self.io = io
+        try:
+            reaped, status, rusage = os.wait4(pid, os.WNOHANG)
+        except ChildProcessError:
+            if self.proc.returncode is None:
+                self.proc.returncode = -1
+            return True
+        if not reaped:
+            return False
+        self.proc.returncode = os.waitstatus_to_exitcode(status)
+        self.rusage = rusage
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to timeout seconds (None = forever); True once the child is reaped.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = 0.0005
+        while True:
+            if self.proc.returncode is not None or self._exited():
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(delay if deadline is None else max(0.0, min(delay, deadline - time.monotonic())))
+            delay = min(delay * 2, 0.05)
+
+
+def _kill_group(reaper: _Reaper, grace: float = _KILL_GRACE_S) -> None:
+    """
+    SIGTERM the child's process group, then SIGKILL whatever is left after `grace`.
+    """
+    pgid = reaper.proc.pid
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            return
+        if reaper.wait(timeout=grace):
+            # The leader is gone; make sure no rank survives it.
+            try:
+                os.killpg(pgid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            return
+
+
+def run_streaming(
+    cmd: list[str],
+    cwd: str,
+    log_path: str,
+    timeout: Optional[float] = None,
+    echo: Optional[IO[str]] = None,
+    echo_rate: float = 0.0,
+) -> RunOutcome:
+    """
+    Run cmd in cwd, appending its combined output to log_path as it arrives.
+    If echo is given, complete lines are also written there (rate-limited by
+    echo_rate lines/s, 0 = unlimited). Returns a RunOutcome.
+    """
+    tee = LineTee(echo, echo_rate) if echo is not None else None
+    started = time.monotonic()
+    deadline = started + timeout if timeout else None
+    timed_out = False
+
+    # Unbuffered so the log can be followed (tail -f) while the simulation runs.
+    with open(log_path, "wb", buffering=0) as log:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=cwd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+        reaper = _Reaper(proc)
+        fd = proc.stdout.fileno()
+        sel = selectors.DefaultSelector()
+        sel.register(fd, selectors.EVENT_READ)
+        try:
+            while True:
+                wait_s = 1.0
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        timed_out = True
+                        break
+                    wait_s = min(wait_s, remaining)
+                reaper.sample_io()
+                if not sel.select(timeout=wait_s):
+                    continue
+                chunk = os.read(fd, _CHUNK_SIZE)
+                if not chunk:
+                    break
+                log.write(chunk)
+                if tee is not None:
+                    tee.feed(chunk)
+
+            if not timed_out:
+                # EOF: all writers closed the pipe, but the leader may still be running.
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not reaper.wait(timeout=remaining):
+                    timed_out = True
+            if timed_out:
+                _kill_group(reaper)
+                # Keep whatever the killed processes managed to flush.
+                drain_until = time.monotonic() + _KILL_GRACE_S
+                while time.monotonic() < drain_until and sel.select(timeout=0.5):
+                    chunk = os.read(fd, _CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    log.write(chunk)
+                    if tee is not None:
+                        tee.feed(chunk)
+        except BaseException:
+            _kill_group(reaper, grace=1.0)
+            raise
+        finally:
+            sel.close()
+            proc.stdout.close()
+            if tee is not None:
+                tee.close()
+        reaper.wait()
+
+    outcome = RunOutcome(proc.returncode, timed_out, wall_s=time.monotonic() - started)
+    if reaper.rusage is not None:
+        ru = reaper.rusage
+        outcome.user_s = ru.ru_utime
+        outcome.sys_s = ru.ru_stime
+        # Linux reports KiB, macOS bytes.
+        outcome.max_rss_kb = int(ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss)
+    outcome.io = reaper.io
+    return outcome
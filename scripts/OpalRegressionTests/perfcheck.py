@@ -0,0 +1,105 @@
+"""
+Runtime regression detection for OPALX across nightly runs.
+
+Each simulation's wall time is compared with the same simulation in a rolling
+window of earlier runs of the same build configuration (Device / Kokkos
+Architecture / Build Type). The baseline is summarised robustly by its median
+and MAD; a run is flagged when it deviates by more than `z_threshold` robust
+standard deviations *and* by more than `min_rel_change` relative to the median,
+so that neither a single outlier in the window nor a near-zero MAD of very
+stable tests produces false alarms.
+"""
+
+from __future__ import annotations
+
+from OpalRegressionTests import history
+
+SLOWER = "slower"
+FASTER = "faster"
+STABLE = "stable"
+NO_BASELINE = "no-baseline"
+
+DEFAULT_WINDOW = 20
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_Z_THRESHOLD = 3.5
+DEFAULT_MIN_REL_CHANGE = 0.10
+# Lower bound of the robust sigma: timer resolution / scheduling jitter.
+_MIN_SIGMA_S = 0.05
+_MIN_SIGMA_REL = 0.02
+# Scales the MAD to a standard deviation for normally distributed data.
+_MAD_TO_SIGMA = 1.4826
+
+
+def _median(values: list[float]) -> float:
+    ordered = sorted(values)
+    n = len(ordered)
+    mid = n // 2
+    return ordered[mid] if n % 2 else 0.5 * (ordered[mid - 1] + ordered[mid])
+
+
+def classify(
+    wall_s: float,
+    baseline: list[float],
+    min_samples: int = DEFAULT_MIN_SAMPLES,
+    z_threshold: float = DEFAULT_Z_THRESHOLD,
+    min_rel_change: float = DEFAULT_MIN_REL_CHANGE,
+) -> dict:
+    """
+    Compare one wall time with its baseline samples; returns the "perf" record.
+    """
+    out: dict = {"wall_s": wall_s, "baseline_n": len(baseline)}
+    if len(baseline) < min_samples:
+        out["state"] = NO_BASELINE
+        return out
+    med = _median(baseline)
+    mad = _median([abs(x - med) for x in baseline])
+    sigma = max(_MAD_TO_SIGMA * mad, _MIN_SIGMA_REL * med, _MIN_SIGMA_S)
+    z = (wall_s - med) / sigma
+    ratio = wall_s / med if med > 0 else None
+    state = STABLE
+    if ratio is not None and z > z_threshold and ratio - 1.0 > min_rel_change:
+        state = SLOWER
+    elif ratio is not None and z < -z_threshold and 1.0 - ratio > min_rel_change:
+        state = FASTER
+    out.update(
+        {
+            "state": state,
+            "baseline_median_s": round(med, 3),
+            "baseline_mad_s": round(mad, 3),
+            "z": round(z, 2),
+            "ratio": (round(ratio, 3) if ratio is not None else None),
+        }
+    )
+    return out
+
+
+def annotate_run(
+    results: dict,
+    run_name: str,
+    nightlybuildx_dir: str,
+    window: int = DEFAULT_WINDOW,
+) -> dict:
+    """
+    Set simulations[].perf and results["perf_summary"] (mutates results) using
+    runs older than run_name. Returns the summary.
+    """
+    config = history.config_key((results.get("build") or {}).get("info"))
+    earlier = [
+        run
+        for run in history.load_history(nightlybuildx_dir, max_runs=None, before=run_name)
+        if run.get("config") == config
+    ][:window]
+
+    summary = {SLOWER: 0, FASTER: 0, STABLE: 0, NO_BASELINE: 0, "window": window, "config": config}
+    for sim in results.get("simulations", []):
+        res = sim.get("resources") or {}
+        wall = res.get("wall_s")
+        if not isinstance(wall, (int, float)) or res.get("timed_out"):
+            sim.pop("perf", None)
+            continue
+        perf = classify(float(wall), history.durations(earlier, sim.get("name", "")))
+        sim["perf"] = perf
+        summary[perf["state"]] += 1
+    results["perf_summary"] = summary
+    return summary
+
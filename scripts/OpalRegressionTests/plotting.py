@@ -0,0 +1,367 @@
+"""
+Rendering of stat comparison plots (simulation vs. reference + difference).
+
+StatTest describes each figure as a PlotJob (file paths, variable, output
+name). Jobs are either rendered in-process or handed to a PlotPool: a
+persistent process pool whose workers import matplotlib and set the style once
+at start-up, so figure rendering runs on all cores while the checks go on.
+
+Every figure has a content key (plot_key) over its input columns, units, title
+and PLOT_STYLE_VERSION. A PlotCache remembers the keys of the figures already in
+a plots/<simname>/ directory, so unchanged figures are not drawn again.
+
+In the "interactive" plot mode no PNGs are drawn: write_plot_data() stores the
+simulation, reference and difference series of a stat file, downsampled with
+LTTB, as a small script that the report pages load and draw on a canvas when a
+simulation is opened (see sitegen.write_report_assets).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Any, NamedTuple, Optional
+
+from OpalRegressionTests import metrics, sdds
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+PLOT_STYLE = "bmh"
+# Bump whenever render() draws differently, to invalidate cached figures.
+PLOT_STYLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+PLOT_MODE_PNG = "png"
+PLOT_MODE_INTERACTIVE = "interactive"
+PLOT_MODES = (PLOT_MODE_PNG, PLOT_MODE_INTERACTIVE)
+PLOT_DATA_SUFFIX = ".plot.js"
+# Points kept per series in the interactive plot data.
+DEFAULT_PLOT_POINTS = 1000
+
+
+class PlotJob(NamedTuple):
+    """
+    Everything a worker needs to draw one figure; the data is read there
+    (sdds.load maps the sidecar or parses the file once per worker).
+    """
+
+    sim_path: str
+    ref_path: str
+    var: str
+    title: str
+    output: str
+    resample: Optional[str] = None
+
+
+def plot_key(job: PlotJob) -> Optional[str]:
+    """
+    Content hash of everything a figure depends on, or None if the files
+    cannot be read or lack the columns.
+    """
+    try:
+        sim = sdds.load(job.sim_path)
+        ref = sdds.load(job.ref_path)
+    except (OSError, ValueError):
+        return None
+    x_name = job.resample or "s"
+    columns = (sim.column(x_name), sim.column(job.var), ref.column(x_name), ref.column(job.var))
+    if any(col is None for col in columns):
+        return None
+    h = hashlib.blake2b(digest_size=16)
+    meta = [PLOT_STYLE_VERSION, PLOT_STYLE, job.var, job.title, job.resample,
+            sim.units(job.var), sim.units(x_name), [len(col) for col in columns]]
+    h.update(json.dumps(meta).encode("utf-8"))
+    for col in columns:
+        h.update(col.tobytes())
+    return h.hexdigest()
+
+
+class PlotCache:
+    """
+    Figures already present in a plot directory, with their plot_key() values
+    from its manifest.json.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.entries: dict[str, str] = {}
+        try:
+            with open(os.path.join(directory, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == PLOT_STYLE_VERSION:
+                self.entries = dict(data.get("plots") or {})
+        except (OSError, ValueError):
+            pass
+
+    def hit(self, fname: str, key: Optional[str]) -> bool:
+        """
+        True if fname exists in the directory and was drawn from the same inputs.
+        """
+        return bool(key) and self.entries.get(fname) == key and os.path.isfile(os.path.join(self.directory, fname))
+
+    def save(self, entries: dict[str, str]) -> None:
+        """
+        Record the keys of the figures now in the directory (fname -> key).
+        """
+        self.entries.update(entries)
+        self.entries = {
+            fname: key for fname, key in self.entries.items()
+            if os.path.isfile(os.path.join(self.directory, fname))
+        }
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": PLOT_STYLE_VERSION, "plots": self.entries}, f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+def matplotlib_available() -> bool:
+    try:
+        import matplotlib  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def import_pyplot() -> Any:
+    """
+    Import pyplot with the non-interactive backend and the report style.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    plt.style.use(PLOT_STYLE)
+    return plt
+
+
+def _pretty_var(var: str) -> str:
+    parts = str.split(var, "_")
+    if len(parts) == 2:
+        return parts[0] + "(" + parts[1] + ")"
+    return parts[0]
+
+
+def render(plt: Any, job: PlotJob) -> str:
+    """
+    Draw job.output; returns its path, or "" if the two files cannot be plotted
+    against each other (missing column, different lengths without resampling).
+    """
+    sim = sdds.load(job.sim_path)
+    ref = sdds.load(job.ref_path)
+    y1, y2 = sim.column(job.var), ref.column(job.var)
+    x_name = job.resample or "s"
+    s1, s2 = sim.column(x_name), ref.column(x_name)
+    if y1 is None or y2 is None or s1 is None or s2 is None:
+        return ""
+    if job.resample:
+        common = metrics.resample(sim, ref, job.var, job.resample)
+        if common is None:
+            return ""
+        # Both series against the axis; the difference lives on the common grid.
+        diff_x, r1, r2 = common
+        diff = [a - b for a, b in zip(r1, r2)]
+    else:
+        if len(s1) == 0 or len(s1) != len(s2):
+            return ""
+        # Compute difference (generated - reference)
+        diff_x = s1
+        diff = [a - b for a, b in zip(y1, y2)]
+
+    pretty_var = _pretty_var(job.var)
+    var_unit = sim.units(job.var).strip()
+    s_unit = sim.units(x_name).strip()
+
+    # Use constrained layout to avoid tight_layout warnings with shared axes/gridspec.
+    fig = plt.figure(figsize=(10.5, 6.5), dpi=140, constrained_layout=True)
+    gs = fig.add_gridspec(2, 1, height_ratios=[3, 1], hspace=0.12)
+    ax = fig.add_subplot(gs[0, 0])
+    ax2 = fig.add_subplot(gs[1, 0], sharex=ax)
+
+    ax.plot(s1, y1, lw=1.8, label="simulation")
+    ax.plot(s2, y2, lw=1.8, label="reference")
+    ax.set_ylabel(f"{pretty_var} [{var_unit}]" if var_unit else pretty_var)
+    ax.legend(loc="upper right", fontsize=8)
+    ax.set_title(job.title)
+
+    ax2.plot(diff_x, diff, lw=1.6, label="difference")
+    ax2.axhline(0.0, lw=1.0, color="black", alpha=0.4)
+    ax2.set_xlabel(f"{x_name} [{s_unit}]" if s_unit else x_name)
+    ax2.set_ylabel(f"delta [{var_unit}]" if var_unit else "delta")
+
+    fig.savefig(job.output)
+    plt.close(fig)
+    return job.output
+
+
+def _as_list(values: Any) -> list:
+    return values.tolist() if hasattr(values, "tolist") else list(values)
+
+
+def lttb(x: Any, y: Any, threshold: int) -> tuple[list, list]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of (x, y) to at most
+    threshold points; keeps the first and last point and the visual shape.
+    """
+    x, y = _as_list(x), _as_list(y)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    every = (n - 2) / (threshold - 2)
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle.
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        cnt = nxt_end - nxt_start
+        avg_x = sum(x[nxt_start:nxt_end]) / cnt
+        avg_y = sum(y[nxt_start:nxt_end]) / cnt
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = x[a], y[a]
+        best, best_j = -1.0, start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+            if area > best:
+                best, best_j = area, j
+        picked.append(best_j)
+        a = best_j
+    picked.append(n - 1)
+    return [x[i] for i in picked], [y[i] for i in picked]
+
+
+def _compact(values: list) -> list:
+    # 7 significant digits are plenty on screen and halve the file size.
+    return [float("%.7g" % v) for v in values]
+
+
+def _series(x: Any, y: Any, points: int) -> list:
+    xs, ys = lttb(x, y, points)
+    return [_compact(xs), _compact(ys)]
+
+
+def plot_series(sim: sdds.StatData, ref: sdds.StatData, var: str, resample: Optional[str] = None,
+                points: int = DEFAULT_PLOT_POINTS) -> Optional[dict]:
+    """
+    Downsampled simulation, reference and difference series of var (the same
+    content as a rendered figure), or None if var cannot be plotted.
+    """
+    x_name = resample or "s"
+    y1, y2 = sim.column(var), ref.column(var)
+    s1, s2 = sim.column(x_name), ref.column(x_name)
+    if y1 is None or y2 is None or s1 is None or s2 is None or len(s1) == 0 or len(s2) == 0:
+        return None
+    out = {
+        "units": sim.units(var).strip(),
+        "x": x_name,
+        "x_units": sim.units(x_name).strip(),
+        "sim": _series(s1, y1, points),
+        "ref": _series(s2, y2, points),
+    }
+    if resample:
+        common = metrics.resample(sim, ref, var, resample)
+        if common is not None:
+            diff_x, r1, r2 = common
+            out["diff"] = _series(diff_x, [a - b for a, b in zip(r1, r2)], points)
+    elif len(s1) == len(s2):
+        out["diff"] = _series(s1, [a - b for a, b in zip(y1, y2)], points)
+    return out
+
+
+def write_plot_data(
+    sim_path: str,
+    ref_path: str,
+    checks: list[tuple[str, Optional[str]]],
+    src: str,
+    output: str,
+    points: int = DEFAULT_PLOT_POINTS,
+) -> list[str]:
+    """
+    Write the plot data of the (var, resample axis) checks of one stat file to
+    output as a script calling rtPlotData(src, data); src is the path the
+    report page loads it from. Returns the variables that were written.
+    """
+    try:
+        sim = sdds.load(sim_path)
+        ref = sdds.load(ref_path)
+    except (OSError, ValueError):
+        return []
+    series = {}
+    for var, resample in checks:
+        if var in series:
+            continue
+        data = plot_series(sim, ref, var, resample, points)
+        if data is not None:
+            series[var] = data
+    if not series:
+        return []
+    payload = json.dumps({"title": os.path.basename(sim_path), "series": series}, separators=(",", ":"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("rtPlotData(%s,%s);\n" % (json.dumps(src), payload))
+    return list(series)
+
+
+_worker_plt = None
+
+
+def _init_worker() -> None:
+    global _worker_plt
+    _worker_plt = import_pyplot()
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _render_in_worker(job: PlotJob) -> str:
+    return render(_worker_plt, job)
+
+
+class PlotPool:
+    """
+    Persistent pool of plot workers. Workers are started (and import
+    matplotlib) right away, so the first figures do not pay for it.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = max(1, int(workers))
+        # spawn: the callers run threads, which fork() does not copy safely.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+
+    def submit(self, job: PlotJob) -> Future:
+        return self._executor.submit(_render_in_worker, job)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "PlotPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def wait_plots(futures: list[Future]) -> list[str]:
+    """
+    Wait for submitted plots; returns the error messages of failed ones.
+    """
+    errors = []
+    wait(futures)
+    for fut in futures:
+        try:
+            fut.result()
+        except Exception as e:
+            errors.append("%s: %s" % (type(e).__name__, e))
+    return errors
@@ -12,13 +12,26 @@ import pathlib
 import re
 import hashlib
 import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 from OpalRegressionTests.reporter import Reporter
 from OpalRegressionTests.reporter import TempXMLElement
 import OpalRegressionTests.stattest as stattest
-from OpalRegressionTests.sitegen import write_report_assets, write_run_report, update_overview
+from OpalRegressionTests import benchmark, plotting, sdds
+from OpalRegressionTests.sitegen import write_report_assets, write_run_report, update_overview, update_trends
 from OpalRegressionTests.beam_meta import load_beam_containers_from_out
+from OpalRegressionTests.timings import load_timings_from_out
 from OpalRegressionTests.console_theme import Theme
+from OpalRegressionTests.launcher import run_streaming
+from OpalRegressionTests.scheduler import SlotScheduler, read_test_cost
+
+# Wall-clock limit for one simulation [s].
+DEFAULT_TIMEOUT_S = 1200
+# Max. simulation output lines per second echoed to the console (0 = unlimited).
+DEFAULT_ECHO_RATE = 200
+# Scratch directory (inside the work directory) of extra benchmark runs.
+_BENCH_DIRNAME = ".benchmark"
 
 
 def discover_stat_stems(reference_dir: str, simname: str) -> list:
@@ -104,8 +117,24 @@ def _select_build_info(cache: dict) -> dict:
 
     return info
 
+
+def _execute_regression_test(job):
+    """
+    Run (and optionally publish) one RegressionTest. Returns the finished test
+    together with the report text it produced; the text is captured per thread
+    so concurrent tests do not interleave in the shared report.
+    """
+    rt, publish, plots_dir, logs_dir = job
+    rep = Reporter()
+    with rep.capture() as captured:
+        rt.run()
+        if publish:
+            rt.publish(plots_dir, logs_dir)
+    return rt, "".join(captured)
+
+
 class OpalRegressionTests:
-    def __init__(self, base_dir, tests, opalx_args, publish_dir=None, timestamp=None, plots_dir=None, logs_dir=None, opalx_exe=None, build_dir=None, unit_tests_summary=None, execution_only=False, raw_data_dir=None, report_root=None):
+    def __init__(self, base_dir, tests, opalx_args, publish_dir=None, timestamp=None, plots_dir=None, logs_dir=None, opalx_exe=None, build_dir=None, unit_tests_summary=None, execution_only=False, raw_data_dir=None, report_root=None, jobs=None, slots=None, echo=True, echo_rate=DEFAULT_ECHO_RATE, schedule=None, timeouts=None, plot_workers=0, benchmark_repeats=0, benchmark_warmup=0):
         self.base_dir = base_dir
         self.tests = tests
         self.opalx_args = opalx_args
@@ -123,6 +152,22 @@ class OpalRegressionTests:
         self.execution_only = execution_only
         self.raw_data_dir = raw_data_dir
         self.report_root = report_root
+        # jobs: max. concurrent tests (None/0 = limited by slots only);
+        # slots: resource capacity, e.g. {"cpu": 64, "gpu": 4}
+        self.slots = dict(slots or {})
+        self.jobs = jobs if jobs else (None if self.slots else 1)
+        self.echo = echo
+        self.echo_rate = echo_rate
+        # schedule: launch order (defaults to self.tests); results keep the order of self.tests.
+        self.schedule = list(schedule) if schedule else list(self.tests)
+        # timeouts: per-test wall-clock limit [s]; missing tests use DEFAULT_TIMEOUT_S.
+        self.timeouts = dict(timeouts or {})
+        # plot_workers: processes rendering plots (0 = render in the test thread)
+        self.plot_workers = plot_workers
+        # benchmark_repeats: measured runs per test (0 = run once, no statistics);
+        # benchmark_warmup: unmeasured runs before them
+        self.benchmark_repeats = benchmark_repeats
+        self.benchmark_warmup = benchmark_warmup
 
     def run(self):
         rep = Reporter()
@@ -159,23 +204,22 @@ class OpalRegressionTests:
             run_results["build"]["cmake_cache"] = cache_path if os.path.isfile(cache_path) else None
             run_results["build"]["info"] = _select_build_info(cache)
 
-        n_tests = len(self.tests)
-        for idx, test in enumerate(self.tests, start=1):
-            rt = RegressionTest(
-                self.base_dir,
-                test,
-                self.opalx_args,
-                timestamp=self.timestamp,
-                execution_only=self.execution_only,
-                raw_data_dir=self.raw_data_dir,
-                publish_dir_fallback=self.publish_dir,
-                progress=(idx, n_tests),
-            )
-            rt.run()
+        plotter = None
+        # Workers import matplotlib at start-up; without it the pool would be broken.
+        if (not self.execution_only and self.plot_workers and self.plot_workers > 0
+                and plotting.matplotlib_available()):
+            plotter = plotting.PlotPool(self.plot_workers)
+        try:
+            outcomes = self._run_tests(plotter)
+        finally:
+            if plotter is not None:
+                plotter.close()
+
+        # Reports are merged in test order, independent of completion order.
+        for rt, report in outcomes:
+            rep.appendReport(report)
             self.totalNrTests += rt.totalNrTests
             self.totalNrPassed += rt.totalNrPassed
-            if not self.execution_only:
-                rt.publish(self.plots_dir, self.logs_dir)
             if rt.result is not None:
                 run_results["simulations"].append(rt.result)
 
@@ -209,6 +253,10 @@ class OpalRegressionTests:
                 write_report_assets(report_root)
                 write_run_report(report_root=report_root, run_dir=self.publish_dir, results=run_results)
                 update_overview(report_root=report_root)
+                try:
+                    update_trends(report_root=report_root)
+                except sqlite3.Error as e:
+                    rep.appendReport("WARNING: trend pages not updated (%s)\n" % e)
 
         rep.appendReport("\nSummary: {passed} / {total} tests passed \n".format(
             passed = self.totalNrPassed,
@@ -219,16 +267,92 @@ class OpalRegressionTests:
                          datetime.datetime.today().isoformat())
         print (rep.getReport())
 
+    def _run_tests(self, plotter):
+        """
+        Run all tests in launch order; returns (test, report text) in test order.
+        """
+        n_tests = len(self.tests)
+        launch_pos = {test: pos for pos, test in enumerate(self.schedule, start=1)}
+        jobs = []
+        for test in self.tests:
+            rt = RegressionTest(
+                self.base_dir,
+                test,
+                self.opalx_args,
+                timestamp=self.timestamp,
+                execution_only=self.execution_only,
+                raw_data_dir=self.raw_data_dir,
+                publish_dir_fallback=self.publish_dir,
+                progress=(launch_pos.get(test, n_tests), n_tests),
+                timeout=self.timeouts.get(test, DEFAULT_TIMEOUT_S),
+                echo_rate=self.echo_rate,
+                plotter=plotter,
+                benchmark_repeats=self.benchmark_repeats,
+                benchmark_warmup=self.benchmark_warmup,
+            )
+            rt.echo_output = self.echo
+            jobs.append((rt, not self.execution_only, self.plots_dir, self.logs_dir))
+
+        order = sorted(range(n_tests), key=lambda i: launch_pos.get(self.tests[i], n_tests))
+        concurrent = n_tests > 1 and self.jobs != 1
+        if concurrent:
+            return self._run_concurrent(jobs, order)
+        outcomes = [None] * n_tests
+        for i in order:
+            outcomes[i] = _execute_regression_test(jobs[i])
+        return outcomes
+
+    def _run_concurrent(self, jobs, order):
+        """
+        Execute tests in a thread pool, gated by the job limit and resource slots.
+        Threads suffice: each test only waits on its own OPALX subprocess.
+        """
+        T = Theme()
+        scheduler = SlotScheduler(max_jobs=self.jobs, capacity=self.slots)
+        costs = []
+        for rt, _publish, _plots_dir, _logs_dir in jobs:
+            rt.echo_output = False
+            cost = read_test_cost(rt.srcdir, rt.simname)
+            clamped = scheduler.clamp(cost)
+            if clamped != cost:
+                sys.stderr.write(
+                    "WARNING: %s requests %s, exceeding --slots; it will run alone\n"
+                    % (rt.simname, cost))
+            costs.append(cost)
+
+        n_tests = len(jobs)
+        finished = [0]
+
+        def _progress(idx, outcome):
+            rt = outcome[0]
+            finished[0] += 1
+            mark = T.green("✓ ") if rt.success else T.red("✗ ")
+            print(mark + T.s(rt.simname, "1") + T.dim(" [{}/{} done]".format(finished[0], n_tests)))
+            sys.stdout.flush()
+
+        print(T.dim("Running up to {} test(s) concurrently{}".format(
+            self.jobs or n_tests,
+            (" within slots " + ",".join("%s=%d" % kv for kv in sorted(self.slots.items())))
+            if self.slots else "")))
+        max_workers = min(n_tests, self.jobs or n_tests)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="regtest") as executor:
+            return scheduler.map(executor, _execute_regression_test, jobs, costs,
+                                 order=order, on_done=_progress)
+
     def _getRevisionTests(self):
         if sys.version_info < (3,0):
             return commands.getoutput("git rev-parse HEAD")
         else:
-            result = subprocess.run(
-                ["git", "rev-parse", "HEAD"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
+            try:
+                result = subprocess.run(
+                    ["git", "rev-parse", "HEAD"],
+                    capture_output=True,
+                    text=True,
+                    timeout=10,
+                    cwd=self.base_dir,
+                )
+            except (OSError, subprocess.SubprocessError):
+                return ""
             return (result.stdout or "").strip() if result.returncode == 0 else ""
 
     def _getRevisionOpalx(self):
@@ -297,6 +421,11 @@ class RegressionTest:
         raw_data_dir=None,
         publish_dir_fallback=None,
         progress=None,
+        timeout=DEFAULT_TIMEOUT_S,
+        echo_rate=DEFAULT_ECHO_RATE,
+        plotter=None,
+        benchmark_repeats=0,
+        benchmark_warmup=0,
     ):
         self.base_dir = base_dir
         self.simname = simname
@@ -314,8 +443,24 @@ class RegressionTest:
         self.queue = ""
         self.date = datetime.date.today().isoformat()
         self.result = None
+        self.success = None
+        # Concurrent runs keep simulation output in <simname>-RT.o only.
+        self.echo_output = True
+        self.echo_rate = echo_rate
+        self.timeout = timeout
+        # Wall time, CPU time, peak RSS and I/O of the simulation (see launcher.RunOutcome)
+        self.resources = None
+        self.timed_out = False
+        # Exit code of the simulation (None if it was not started or timed out)
+        self.returncode = None
         self._staged_data_dir = None
         self._baseline_files = set()
+        # Optional plotting.PlotPool shared by all tests of a run.
+        self.plotter = plotter
+        self._plot_futures = []
+        # Benchmark mode: warm-up and extra measured runs (see benchmark.py).
+        self.benchmark_repeats = benchmark_repeats
+        self.benchmark_warmup = benchmark_warmup
 
     def _prepare_workdir_layout(self) -> None:
         """
@@ -332,7 +477,12 @@ class RegressionTest:
             parent = os.path.join(tempfile.gettempdir(), "opalx_regtest_work")
         os.makedirs(parent, exist_ok=True)
         self.workdir = os.path.join(parent, self.simname)
-        dst = self.workdir
+        self._copy_inputs(self.workdir)
+
+    def _copy_inputs(self, dst):
+        """
+        Fresh copy of the test inputs in dst, with reference/ linked to the source.
+        """
         shutil.rmtree(dst, ignore_errors=True)
         os.makedirs(dst, exist_ok=True)
         for name in os.listdir(self.srcdir):
@@ -354,26 +504,30 @@ class RegressionTest:
 
     def _export_raw_outputs(self):
         """
-        Copy newly-generated files for this simulation to raw_data_dir/<simname>/.
+        Copy newly-generated files for this simulation to raw_data_dir/<simname>/
+        and store a binary sidecar (sdds.write_sidecar) next to every stat file,
+        so build_report can map the columns instead of parsing the ASCII data.
         """
         if not self.raw_data_dir:
             return
         src_dir = pathlib.Path(self.workdir)
         dst_dir = pathlib.Path(self.raw_data_dir) / self.simname
-        if os.path.abspath(str(src_dir)) == os.path.abspath(str(dst_dir)):
-            return
-        dst_dir.mkdir(parents=True, exist_ok=True)
-        for p in src_dir.iterdir():
-            if not p.is_file():
-                continue
-            if p.name.startswith("."):
-                continue
-            if p.name in self._baseline_files:
-                continue
-            try:
-                shutil.copy(str(p), str(dst_dir / p.name))
-            except Exception:
-                continue
+        if os.path.abspath(str(src_dir)) != os.path.abspath(str(dst_dir)):
+            dst_dir.mkdir(parents=True, exist_ok=True)
+            for p in src_dir.iterdir():
+                if not p.is_file():
+                    continue
+                if p.name.startswith("."):
+                    continue
+                if p.name in self._baseline_files:
+                    continue
+                try:
+                    shutil.copy(str(p), str(dst_dir / p.name))
+                except Exception:
+                    continue
+        for p in dst_dir.iterdir():
+            if p.suffix in (".stat", ".smb") and p.is_file() and p.name not in self._baseline_files:
+                sdds.write_sidecar(str(p))
 
     def _stage_generated_files(self):
         """
@@ -425,10 +579,12 @@ class RegressionTest:
         """
         with open (fname_md5sum, 'r') as f:
             first_line = f.readline ()
-            f.close()
 
         md5sum, fname = first_line.split()
-        ok = md5sum == hashlib.md5(open(fname, 'rb').read()).hexdigest()
+        # file names in the checksum file are relative to the checksum file itself
+        fname = os.path.join(os.path.dirname(fname_md5sum), fname)
+        with open(fname, 'rb') as f:
+            ok = md5sum == hashlib.md5(f.read()).hexdigest()
         return ok
 
 
@@ -439,7 +595,6 @@ class RegressionTest:
         the simulation run
         """
         rep = Reporter()
-        os.chdir(self.workdir)
         ref_abs = os.path.join(self.workdir, "reference")
         allok = True
         stems = discover_stat_stems(ref_abs, self.simname)
@@ -449,12 +604,11 @@ class RegressionTest:
                 % (self.simname, self.simname)
             )
             return False
-        os.chdir("reference")
         for stem in stems:
-            fname = stem + ".stat"
+            fname = os.path.join(ref_abs, stem + ".stat")
             fname_md5 = fname + ".md5"
             if not os.path.isfile(fname):
-                rep.appendReport("\t Reference file %s is missing!\n" % fname)
+                rep.appendReport("\t Reference file %s is missing!\n" % os.path.basename(fname))
                 allok = False
             if os.path.islink(fname_md5):
                 continue
@@ -473,14 +627,13 @@ class RegressionTest:
         """
         rep = Reporter()
         allok = True
-        os.chdir(self.workdir)
         ref_abs = os.path.join(self.workdir, "reference")
         stems = discover_stat_stems(ref_abs, self.simname)
         if not stems:
             return True
         for stem in stems:
             out = stem + ".stat"
-            if not os.path.isfile(out):
+            if not os.path.isfile(os.path.join(self.workdir, out)):
                 allok = False
                 rep.appendReport("\t ERROR: Expected output file %s missing\n" % out)
 
@@ -491,39 +644,38 @@ class RegressionTest:
         rep = Reporter()
         chksum_ok = self._check_md5sum(fname)
         rep.appendReport("\t Checksum for reference %s %s \n" % (
-            fname, ('OK' if chksum_ok else 'FAILED')))
+            os.path.basename(fname), ('OK' if chksum_ok else 'FAILED')))
         return chksum_ok
 
     def _cleanup(self):
         """
         cleanup all OLD job files if there are any
         """
-        for p in pathlib.Path(".").glob(self.simname + "-RT.*"):
+        workdir = pathlib.Path(self.workdir)
+        for p in workdir.glob(self.simname + "-RT.*"):
             p.unlink()
 
-        for p in pathlib.Path(".").glob(self.simname + "*.png"):
+        for p in workdir.glob(self.simname + "*.png"):
             p.unlink()
 
-        for p in pathlib.Path(".").glob("*.loss"):
+        for p in workdir.glob("*.loss"):
             p.unlink()
 
-        for p in pathlib.Path(".").glob("*.smb"):
+        for p in workdir.glob("*.smb"):
             p.unlink()
 
-        for p in pathlib.Path(".").glob(self.simname + ".stat"):
+        for p in workdir.glob(self.simname + ".stat"):
             p.unlink()
-        for p in pathlib.Path(".").glob(self.simname + "_c*.stat"):
+        for p in workdir.glob(self.simname + "_c*.stat"):
             p.unlink()
 
-        if os.path.isfile (self.simname + ".lbal"):
-            os.remove (self.simname + ".lbal")
-
-        if os.path.isfile (self.simname + ".out"):
-            os.remove (self.simname + ".out")
+        for ext in (".lbal", ".out"):
+            path = workdir / (self.simname + ext)
+            if path.is_file():
+                path.unlink()
 
     def run(self, run_local = True, q = None):
         self._prepare_workdir_layout()
-        os.chdir(self.workdir)
         self.queue = q
         self._cleanup()
         # Capture baseline file set (materialized inputs under the workdir)
@@ -535,15 +687,34 @@ class RegressionTest:
         success = False
         # for the time being run_local is always true!
         if run_local:
+            for k in range(self.benchmark_warmup if self.benchmark_repeats else 0):
+                self._run_repetition("warm-up %d/%d" % (k + 1, self.benchmark_warmup))
             success = self.mpirun()
         else:
             # :FIXME: this is broken!
             self.submitToSGE()
             self.waitUntilCompletion()
+        self.success = success
 
         # copy to out file
-        if os.path.isfile (self.simname + "-RT.o"):
-            shutil.copy (self.simname + "-RT.o", self.simname + ".out")
+        rt_log = os.path.join(self.workdir, self.simname + "-RT.o")
+        if os.path.isfile (rt_log):
+            shutil.copy (rt_log, os.path.join(self.workdir, self.simname + ".out"))
+
+        # Benchmark mode: the first repetition is the run above (the only one compared
+        # with the references); the others run before its outputs are checked.
+        # Runs that crashed or timed out count as failed, not as samples.
+        repetitions = []
+        if self.benchmark_repeats and run_local:
+            if success and self.returncode == 0 and self.resources:
+                repetitions.append({
+                    "wall_s": self.resources["wall_s"],
+                    "timings": load_timings_from_out(rt_log),
+                })
+            for k in range(1, self.benchmark_repeats):
+                r = self._run_repetition("repetition %d/%d" % (k + 1, self.benchmark_repeats))
+                if r is not None:
+                    repetitions.append(r)
 
         output_ok = self._validateOutputFiles()
         if output_ok:
@@ -564,6 +735,12 @@ class RegressionTest:
             "log_relpath": None,
             "beam_containers": [],
         }
+        if self.resources is not None:
+            self.result["resources"] = dict(
+                self.resources,
+                timeout_s=self.timeout,
+                timed_out=self.timed_out,
+            )
         ref_dir_meta = os.path.join(self.workdir, "reference")
         stat_stems_meta = discover_stat_stems(ref_dir_meta, self.simname)
         out_path_meta = os.path.join(self.workdir, self.simname + ".out")
@@ -573,8 +750,18 @@ class RegressionTest:
         self.result["beam_containers"] = beam_containers
         if beam_meta_warn:
             self.result["beam_metadata_warning"] = beam_meta_warn
+        sim_timings = load_timings_from_out(out_path_meta)
+        if sim_timings:
+            self.result["timings"] = sim_timings
+        if self.benchmark_repeats and run_local:
+            bench = benchmark.summarize_repetitions(
+                repetitions, self.benchmark_repeats, warmup=self.benchmark_warmup)
+            if bench is not None:
+                self.result["benchmark"] = bench
+            else:
+                rep.appendReport("WARNING: no benchmark repetition of %s succeeded\n" % self.simname)
 
-        rt_filename = self.simname + ".rt"
+        rt_filename = os.path.join(self.workdir, self.simname + ".rt")
         if os.path.exists(rt_filename):
             with open(rt_filename, "r") as infile:
                 tests = [line.rstrip('\n') for line in infile]
@@ -661,15 +848,32 @@ class RegressionTest:
                     "plot": None,
                 })
 
+        self._finish_plots()
         if self.execution_only:
             self._export_raw_outputs()
 
+    def _finish_plots(self):
+        """
+        Wait for plots submitted to the plot pool and drop links to figures
+        that could not be rendered.
+        """
+        if not self._plot_futures:
+            return
+        rep = Reporter()
+        for err in plotting.wait_plots(self._plot_futures):
+            rep.appendReport("ERROR: plot rendering failed (%s)\n" % err)
+        self._plot_futures = []
+        for t in (self.result or {}).get("tests", []):
+            plot = t.get("plot")
+            if plot and not os.path.isfile(os.path.join(self.workdir, os.path.basename(plot))):
+                t["plot"] = None
+
     def publish(self, plots_dir, logs_dir):
         # Copy plots into plots_dir/<simname>/
         if plots_dir:
             sim_plots_dir = os.path.join(plots_dir, self.simname)
             pathlib.Path(sim_plots_dir).mkdir(parents=True, exist_ok=True)
-            for p in pathlib.Path(".").glob("*.png"):
+            for p in pathlib.Path(self.workdir).glob("*.png"):
                 shutil.copy(p, sim_plots_dir)
 
         # Copy the combined stdout/stderr log into logs_dir
@@ -686,10 +890,9 @@ class RegressionTest:
         self._stage_generated_files()
 
     def mpirun(self):
-        os.chdir(self.workdir)
         rep = Reporter()
         T = Theme()
-        if not os.access (self.simname+".local", os.X_OK):
+        if not os.access (os.path.join(self.workdir, self.simname + ".local"), os.X_OK):
             rep.appendReport ("Error: "+self.simname+".local file could not be executed\n")
 
         cmd = [ os.path.join(".", self.simname + ".local") ]
@@ -706,31 +909,80 @@ class RegressionTest:
         )
         print("  " + T.dim(cmd[0]))
         sys.stdout.flush()
-        with open(self.simname + "-RT.o", "wb") as f:
-            try:
-                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                out, err = proc.communicate(timeout=1200)
-                print(out.decode("utf-8", errors="replace"), end="")
-                print(err.decode("utf-8", errors="replace"), end="")
-                f.write (out)
-                f.write (err)
-            except subprocess.TimeoutExpired:
-                msg = "%s timed out!!!" % (cmd)
-                print(T.red(msg))
-                rep.appendReport(msg)
-                return False
-            except subprocess.CalledProcessError as e:
-                msg = "%s exited with code %d" % (cmd, e.returncode)
-                print(T.red(msg))
-                rep.appendReport(msg)
-                return False
+        log_path = os.path.join(self.workdir, self.simname + "-RT.o")
+        started = time.monotonic()
+        try:
+            # cmd[0] is resolved relative to cwd
+            outcome = run_streaming(
+                cmd,
+                cwd=self.workdir,
+                log_path=log_path,
+                timeout=self.timeout,
+                echo=(sys.stdout if self.echo_output else None),
+                echo_rate=self.echo_rate,
+            )
+        except OSError as e:
+            self.resources = {"wall_s": round(time.monotonic() - started, 3)}
+            msg = "%s could not be started: %s" % (cmd, e)
+            print(T.red(msg))
+            rep.appendReport(msg + "\n")
+            return False
+
+        self.resources = outcome.resources()
+        self.timed_out = outcome.timed_out
+        self.returncode = None if outcome.timed_out else outcome.returncode
+        if outcome.timed_out:
+            msg = "%s timed out after %ss!!!" % (cmd, self.timeout)
+            print(T.red(msg))
+            rep.appendReport(msg + "\n")
+            return False
+        if outcome.returncode:
+            # A non-zero exit alone does not fail the test; the output checks decide.
+            rep.appendReport("%s exited with code %d\n" % (cmd, outcome.returncode))
 
         return True
 
+    def _run_repetition(self, label):
+        """
+        One benchmark run without comparison, in a scratch copy of the inputs so
+        that the outputs of the compared run stay untouched. Returns
+        {"wall_s", "timings"}, or None if OPALX could not be started, timed out or
+        exited with an error.
+        """
+        T = Theme()
+        scratch = os.path.join(self.workdir, _BENCH_DIRNAME)
+        log_path = os.path.join(scratch, self.simname + "-RT.o")
+        cmd = [os.path.join(".", self.simname + ".local")]
+        cmd.extend(self.args)
+        try:
+            self._copy_inputs(scratch)
+            outcome = run_streaming(
+                cmd,
+                cwd=scratch,
+                log_path=log_path,
+                timeout=self.timeout,
+                echo=None,
+            )
+            if outcome.timed_out:
+                print(T.red("  %s %s timed out after %ss" % (self.simname, label, self.timeout)))
+                return None
+            if outcome.returncode:
+                print(T.red("  %s %s exited with code %d" % (self.simname, label, outcome.returncode)))
+                return None
+            wall_s = outcome.resources()["wall_s"]
+            print("  " + T.dim("%s %s: %.2f s" % (self.simname, label, wall_s)))
+            return {"wall_s": wall_s, "timings": load_timings_from_out(log_path)}
+        except OSError as e:
+            print(T.red("  %s %s could not be started: %s" % (self.simname, label, e)))
+            return None
+        finally:
+            sys.stdout.flush()
+            shutil.rmtree(scratch, ignore_errors=True)
+
     def submitToSGE(self):
         # FIXME: we could create a sge file on the fly if no sge is specified
         # for a give test ("default sge")
-        qsub_command = "qsub " + self.queue + " " + self.simname + ".sge"
+        qsub_command = "qsub " + self.queue + " " + os.path.join(self.workdir, self.simname + ".sge")
         qsub_command += "-v REG_TEST_DIR=" + self.workdir + ",OPALX_EXE_PATH=" + os.getenv("OPALX_EXE_PATH")
         submit_out = subprocess.getoutput(qsub_command)
         self.jobnr = str.split(submit_out, " ")[2]
@@ -794,10 +1046,14 @@ class RegressionTest:
             rtest = stattest.StatTest(
                 var, params[0], float(params[1]),
                 self.workdir, stem, plot_dirname=self.simname,
-                generate_plot=(not self.execution_only))
+                generate_plot=(not self.execution_only),
+                plotter=self.plotter,
+                **stattest.parse_check_options(params[2:]))
         else:
             return None
 
         passed = rtest.checkResult(root)
+        if rtest.plot_future is not None:
+            self._plot_futures.append(rtest.plot_future)
         self._last_check_result = getattr(rtest, "last_result", None)
         return passed
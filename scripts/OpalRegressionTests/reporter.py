@@ -1,40 +1,64 @@
+import contextlib
+import threading
 import xml.dom
 import xml.dom.minidom
 
 class Reporter:
 
     __shared_state = {}
+    __lock = threading.RLock()
+    __local = threading.local()
     def __init__(self):
         #BORG DP
         self.__dict__ = self.__shared_state
 
     def appendReport(self, string):
-        rep = getattr(self, '_report', None)
-        if rep is None:
-            self._report = string
-        else:
-            self._report += string
+        buf = getattr(Reporter.__local, 'buffer', None)
+        if buf is not None:
+            buf.append(string)
+            return
+        with Reporter.__lock:
+            rep = getattr(self, '_report', None)
+            if rep is None:
+                self._report = string
+            else:
+                self._report += string
+
+    @contextlib.contextmanager
+    def capture(self):
+        """
+        Collect the report text appended by the current thread in a private
+        list instead of the shared report (used for concurrently running tests).
+        """
+        prev = getattr(Reporter.__local, 'buffer', None)
+        Reporter.__local.buffer = []
+        try:
+            yield Reporter.__local.buffer
+        finally:
+            Reporter.__local.buffer = prev
 
     def getReport(self):
         return getattr(self, '_report', None)
 
     def appendChild(self, element):
-        root = getattr(self, 'root_element', None)
-        if root is None:
-            self.xml_report = xml.dom.minidom.Document()
-            self.root_element = self.xml_report.createElement("Tests")
-            self.xml_report.appendChild(self.root_element)
+        with Reporter.__lock:
+            root = getattr(self, 'root_element', None)
+            if root is None:
+                self.xml_report = xml.dom.minidom.Document()
+                self.root_element = self.xml_report.createElement("Tests")
+                self.xml_report.appendChild(self.root_element)
 
-        self.root_element.appendChild(element.node())
+            self.root_element.appendChild(element.node())
 
     def getDom(self):
-        root = getattr(self, 'root_element', None)
-        if root is None:
-            self.xml_report = xml.dom.minidom.Document()
-            self.root_element = self.xml_report.createElement("Tests")
-            self.xml_report.appendChild(self.root_element)
+        with Reporter.__lock:
+            root = getattr(self, 'root_element', None)
+            if root is None:
+                self.xml_report = xml.dom.minidom.Document()
+                self.root_element = self.xml_report.createElement("Tests")
+                self.xml_report.appendChild(self.root_element)
 
-        return self.xml_report
+            return self.xml_report
 
 class TempXMLElement:
     def __init__(self, name):
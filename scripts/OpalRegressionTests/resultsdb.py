@@ -0,0 +1,355 @@
+"""
+SQLite store of all runs, for questions across the run history ("when did
+rms_x of Fodo-long start drifting", "which checks flip between passed and
+failed") without opening every results.json.
+
+build_report keeps report/results.sqlite in sync with runs/*/results.json and
+runs_remote/*/results.json: a run is (re-)inserted when its results.json mtime
+differs from the one stored, and rows of deleted runs are removed.
+scripts/query_results is the command-line front end.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from typing import Any, Iterable, Optional
+
+from OpalRegressionTests import history
+
+DB_FILENAME = "results.sqlite"
+_SCHEMA_VERSION = 4
+_SOURCES = ("runs", "runs_remote")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    run TEXT NOT NULL,
+    results_mtime REAL,
+    timestamp TEXT,
+    config TEXT,
+    device TEXT,
+    build_type TEXT,
+    kokkos_arch TEXT,
+    compiler TEXT,
+    code_rev TEXT,
+    tests_rev TEXT,
+    total INTEGER,
+    passed INTEGER,
+    failed INTEGER,
+    broken INTEGER,
+    unit_state TEXT,
+    UNIQUE (source, run)
+);
+CREATE TABLE IF NOT EXISTS simulations (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    description TEXT,
+    wall_s REAL,
+    user_s REAL,
+    sys_s REAL,
+    max_rss_kb INTEGER,
+    timed_out INTEGER,
+    perf_state TEXT,
+    perf_ratio REAL,
+    UNIQUE (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    sim_id INTEGER NOT NULL REFERENCES simulations(id) ON DELETE CASCADE,
+    simulation TEXT NOT NULL,
+    type TEXT,
+    var TEXT,
+    mode TEXT,
+    eps REAL,
+    delta REAL,
+    state TEXT,
+    stat_stem TEXT,
+    resample TEXT
+);
+CREATE TABLE IF NOT EXISTS beam_containers (
+    id INTEGER PRIMARY KEY,
+    sim_id INTEGER NOT NULL REFERENCES simulations(id) ON DELETE CASCADE,
+    stat_stem TEXT,
+    beam_name TEXT,
+    species TEXT,
+    n_macroparticles TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS timers (
+    id INTEGER PRIMARY KEY,
+    sim_id INTEGER NOT NULL REFERENCES simulations(id) ON DELETE CASCADE,
+    simulation TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ranks INTEGER,
+    wall_tot REAL,
+    wall_max REAL,
+    wall_avg REAL,
+    wall_min REAL
+);
+CREATE INDEX IF NOT EXISTS runs_by_config ON runs (config, run);
+CREATE INDEX IF NOT EXISTS simulations_by_name ON simulations (name);
+CREATE INDEX IF NOT EXISTS checks_by_key ON checks (simulation, var, mode, stat_stem);
+CREATE INDEX IF NOT EXISTS checks_by_run ON checks (run_id);
+CREATE INDEX IF NOT EXISTS checks_by_state ON checks (state);
+CREATE INDEX IF NOT EXISTS checks_by_sim ON checks (sim_id);
+CREATE INDEX IF NOT EXISTS beam_by_sim ON beam_containers (sim_id);
+CREATE INDEX IF NOT EXISTS timers_by_name ON timers (simulation, name);
+CREATE INDEX IF NOT EXISTS timers_by_sim ON timers (sim_id);
+"""
+
+
+def default_path(report_root: str) -> str:
+    return os.path.join(report_root, DB_FILENAME)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Open (and create or migrate) the database.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, _SCHEMA_VERSION):
+        # Derived data only: rebuilt from the results.json files on the next sync.
+        for table in ("timers", "beam_containers", "checks", "simulations", "runs"):
+            conn.execute("DROP TABLE IF EXISTS %s" % table)
+    conn.executescript(_SCHEMA)
+    conn.execute("PRAGMA user_version = %d" % _SCHEMA_VERSION)
+    return conn
+
+
+def _float(v: Any) -> Optional[float]:
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def upsert_run(
+    conn: sqlite3.Connection,
+    source: str,
+    run: str,
+    results: dict,
+    results_mtime: Optional[float] = None,
+) -> int:
+    """
+    Replace everything stored for (source, run) by the contents of results.
+    Returns the run id. The caller commits.
+    """
+    conn.execute("DELETE FROM runs WHERE source = ? AND run = ?", (source, run))
+    info = (results.get("build") or {}).get("info") or {}
+    revisions = results.get("revisions") or {}
+    summary = results.get("summary") or {}
+    cur = conn.execute(
+        "INSERT INTO runs (source, run, results_mtime, timestamp, config, device, build_type, kokkos_arch,"
+        " compiler, code_rev, tests_rev, total, passed, failed, broken, unit_state)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            source,
+            run,
+            results_mtime,
+            results.get("timestamp") or run,
+            history.config_key(info),
+            info.get("Device"),
+            info.get("Build Type"),
+            info.get("Kokkos Architecture"),
+            info.get("Compiler"),
+            revisions.get("code_full"),
+            revisions.get("tests_full"),
+            summary.get("total"),
+            summary.get("passed"),
+            summary.get("failed"),
+            summary.get("broken"),
+            (results.get("unit_tests") or {}).get("state"),
+        ),
+    )
+    run_id = cur.lastrowid
+    seen = set()
+    for sim in results.get("simulations", []):
+        name = sim.get("name")
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        res = sim.get("resources") or {}
+        perf = sim.get("perf") or {}
+        sim_id = conn.execute(
+            "INSERT INTO simulations (run_id, name, description, wall_s, user_s, sys_s, max_rss_kb, timed_out,"
+            " perf_state, perf_ratio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                name,
+                sim.get("description"),
+                _float(res.get("wall_s")),
+                _float(res.get("user_s")),
+                _float(res.get("sys_s")),
+                res.get("max_rss_kb"),
+                (int(bool(res["timed_out"])) if "timed_out" in res else None),
+                perf.get("state"),
+                _float(perf.get("ratio")),
+            ),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO checks (run_id, sim_id, simulation, type, var, mode, eps, delta, state, stat_stem, resample)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run_id,
+                    sim_id,
+                    name,
+                    t.get("type"),
+                    t.get("var"),
+                    t.get("mode"),
+                    _float(t.get("eps")),
+                    _float(t.get("delta")),
+                    t.get("state"),
+                    t.get("stat_stem"),
+                    t.get("resample"),
+                )
+                for t in sim.get("tests", [])
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO beam_containers (sim_id, stat_stem, beam_name, species, n_macroparticles, data)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    sim_id,
+                    b.get("stat_stem"),
+                    b.get("beam_name"),
+                    b.get("species"),
+                    b.get("n_macroparticles"),
+                    json.dumps(b, sort_keys=True),
+                )
+                for b in (sim.get("beam_containers") or [])
+            ],
+        )
+        sim_timings = sim.get("timings") or {}
+        conn.executemany(
+            "INSERT INTO timers (sim_id, simulation, name, ranks, wall_tot, wall_max, wall_avg, wall_min)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    sim_id,
+                    name,
+                    t.get("name"),
+                    sim_timings.get("ranks"),
+                    _float(t.get("tot")),
+                    _float(t.get("max")),
+                    _float(t.get("avg")),
+                    _float(t.get("min")),
+                )
+                for t in (sim_timings.get("timers") or [])
+                if t.get("name")
+            ],
+        )
+    return run_id
+
+
+def _run_dirs(nightlybuildx_dir: str) -> Iterable[tuple[str, str, str]]:
+    for source in _SOURCES:
+        base = os.path.join(nightlybuildx_dir, source)
+        try:
+            names = os.listdir(base)
+        except OSError:
+            continue
+        for name in names:
+            rpath = os.path.join(base, name, "results.json")
+            if os.path.isfile(rpath):
+                yield source, name, rpath
+
+
+def sync(db_path: str, nightlybuildx_dir: str) -> set[str]:
+    """
+    Bring the database in line with the results.json files on disk.
+    Returns the names of the simulations whose history changed (runs added,
+    updated or removed), e.g. to refresh only their trend pages.
+    """
+    conn = connect(db_path)
+    try:
+        stored = {
+            (row["source"], row["run"]): row["results_mtime"]
+            for row in conn.execute("SELECT source, run, results_mtime FROM runs")
+        }
+        changed: set[str] = set()
+        present = set()
+        with conn:
+            for source, run, rpath in _run_dirs(nightlybuildx_dir):
+                present.add((source, run))
+                try:
+                    mtime = os.path.getmtime(rpath)
+                except OSError:
+                    continue
+                if stored.get((source, run)) == mtime:
+                    continue
+                try:
+                    with open(rpath, "r", encoding="utf-8") as f:
+                        results = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                changed.update(_simulations_of(conn, source, run))
+                upsert_run(conn, source, run, results, mtime)
+                changed.update(sim.get("name") for sim in results.get("simulations", []) if sim.get("name"))
+            for source, run in stored:
+                if (source, run) not in present:
+                    changed.update(_simulations_of(conn, source, run))
+                    conn.execute("DELETE FROM runs WHERE source = ? AND run = ?", (source, run))
+        return changed
+    finally:
+        conn.close()
+
+
+def _simulations_of(conn: sqlite3.Connection, source: str, run: str) -> list[str]:
+    return [
+        row[0]
+        for row in conn.execute(
+            "SELECT s.name FROM simulations s JOIN runs r ON r.id = s.run_id WHERE r.source = ? AND r.run = ?",
+            (source, run),
+        )
+    ]
+
+
+def check_history(conn: sqlite3.Connection, simulation: str) -> list[sqlite3.Row]:
+    """
+    All stat checks of one simulation across runs, oldest run first.
+    """
+    return conn.execute(
+        "SELECT r.run, r.source, r.config, c.stat_stem, c.var, c.mode, c.eps, c.delta, c.state"
+        " FROM checks c JOIN runs r ON r.id = c.run_id"
+        " WHERE c.simulation = ? AND c.type = 'stat'"
+        " ORDER BY r.run, r.source",
+        (simulation,),
+    ).fetchall()
+
+
+def runtime_history(conn: sqlite3.Connection, simulation: str) -> list[sqlite3.Row]:
+    """
+    Wall times of one simulation across runs, oldest run first.
+    """
+    return conn.execute(
+        "SELECT r.run, r.source, r.config, s.wall_s, s.timed_out"
+        " FROM simulations s JOIN runs r ON r.id = s.run_id"
+        " WHERE s.name = ?"
+        " ORDER BY r.run, r.source",
+        (simulation,),
+    ).fetchall()
+
+
+def simulation_overview(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+    """
+    One row per simulation: number of runs and the most recent run.
+    """
+    return conn.execute(
+        "SELECT s.name, COUNT(*) AS runs, MAX(r.run) AS last_run"
+        " FROM simulations s JOIN runs r ON r.id = s.run_id"
+        " GROUP BY s.name ORDER BY s.name"
+    ).fetchall()
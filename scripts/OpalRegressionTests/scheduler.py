@@ -0,0 +1,161 @@
+"""
+Resource-slot scheduling for concurrent regression simulations.
+
+Every test declares a resource cost (e.g. ``cpu=4,gpu=1``); the scheduler keeps
+launching tests as long as their cost fits into the remaining capacity and the
+job limit, so a suite is bounded by its longest test rather than by the sum.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Optional, Sequence
+
+DEFAULT_COST = {"cpu": 1}
+
+# Explicit declaration inside <simname>.local, e.g. "# regtest-slots: cpu=4,gpu=1"
+_SLOTS_DIRECTIVE_RE = re.compile(r"^\s*#\s*regtest-slots\s*:\s*(.+?)\s*$", re.IGNORECASE)
+# Fallback: infer the CPU cost from the launcher line of the .local script.
+_NP_RE = re.compile(r"\b(?:mpirun|mpiexec|srun)\b.*?\s(?:-np|-n|--ntasks)[\s=]+(\d+)")
+
+
+def parse_slots(spec: Optional[str]) -> dict[str, int]:
+    """
+    Parse "cpu=8,gpu=2" (commas or whitespace) into {"cpu": 8, "gpu": 2}.
+    """
+    out: dict[str, int] = {}
+    if not spec:
+        return out
+    for item in re.split(r"[,\s]+", spec.strip()):
+        if not item:
+            continue
+        if "=" not in item:
+            raise ValueError("invalid slot spec %r (expected name=count)" % item)
+        name, value = item.split("=", 1)
+        name = name.strip().lower()
+        try:
+            count = int(value)
+        except ValueError:
+            raise ValueError("invalid slot count in %r" % item) from None
+        if not name or count < 0:
+            raise ValueError("invalid slot spec %r" % item)
+        out[name] = count
+    return out
+
+
+def read_test_cost(srcdir: str, simname: str) -> dict[str, int]:
+    """
+    Resource cost of one regression test.
+
+    Lookup order: sidecar <simname>.slots, a "# regtest-slots:" line in
+    <simname>.local, the rank count of an mpirun/srun line in <simname>.local,
+    and finally DEFAULT_COST.
+    """
+    sidecar = os.path.join(srcdir, simname + ".slots")
+    if os.path.isfile(sidecar):
+        try:
+            with open(sidecar, "r", encoding="utf-8", errors="replace") as f:
+                text = " ".join(line.split("#", 1)[0] for line in f)
+            cost = parse_slots(text)
+            if cost:
+                return cost
+        except (OSError, ValueError) as e:
+            sys.stderr.write("WARNING: ignoring %s (%s)\n" % (sidecar, e))
+
+    local = os.path.join(srcdir, simname + ".local")
+    inferred: Optional[dict[str, int]] = None
+    try:
+        with open(local, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                m = _SLOTS_DIRECTIVE_RE.match(line)
+                if m:
+                    try:
+                        cost = parse_slots(m.group(1))
+                    except ValueError as e:
+                        sys.stderr.write("WARNING: ignoring slots in %s (%s)\n" % (local, e))
+                        continue
+                    if cost:
+                        return cost
+                if inferred is None and not line.lstrip().startswith("#"):
+                    m = _NP_RE.search(line)
+                    if m:
+                        inferred = {"cpu": max(1, int(m.group(1)))}
+    except OSError:
+        pass
+    return inferred or dict(DEFAULT_COST)
+
+
+class SlotScheduler:
+    """
+    Launch callables on an executor while honouring a job limit and per-resource
+    capacities. Tests are started in the given order; a test that does not fit
+    yet is skipped in favour of later ones that do (backfilling).
+    """
+
+    def __init__(self, max_jobs: Optional[int] = None, capacity: Optional[dict[str, int]] = None):
+        self.max_jobs = max(1, int(max_jobs)) if max_jobs else None
+        self.capacity = dict(capacity or {})
+
+    def clamp(self, cost: dict[str, int]) -> dict[str, int]:
+        """
+        Limit a cost to the capacity so that oversized tests still run. A test
+        exceeding the capacity of any resource reserves all of every resource,
+        so it runs alone.
+        """
+        if any(count > self.capacity.get(name, count) for name, count in cost.items()):
+            return {**cost, **self.capacity}
+        return dict(cost)
+
+    def _fits(self, in_use: dict[str, int], cost: dict[str, int]) -> bool:
+        for name, count in cost.items():
+            cap = self.capacity.get(name)
+            if cap is not None and in_use.get(name, 0) + count > cap:
+                return False
+        return True
+
+    def map(
+        self,
+        executor: Any,
+        fn: Callable[[Any], Any],
+        items: Sequence[Any],
+        costs: Sequence[dict[str, int]],
+        order: Optional[Sequence[int]] = None,
+        on_done: Optional[Callable[[int, Any], None]] = None,
+    ) -> list[Any]:
+        """
+        Run fn(item) for every item, launching in `order` (indices, default: as
+        given); results are returned in the order of items.
+        """
+        costs = [self.clamp(c) for c in costs]
+        pending = list(order) if order is not None else list(range(len(items)))
+        running: dict[Any, int] = {}
+        in_use: dict[str, int] = {}
+        results: list[Any] = [None] * len(items)
+
+        while pending or running:
+            i = 0
+            while i < len(pending):
+                if self.max_jobs is not None and len(running) >= self.max_jobs:
+                    break
+                idx = pending[i]
+                if not self._fits(in_use, costs[idx]):
+                    i += 1
+                    continue
+                fut = executor.submit(fn, items[idx])
+                running[fut] = idx
+                for name, count in costs[idx].items():
+                    in_use[name] = in_use.get(name, 0) + count
+                pending.pop(i)
+
+            done, _not_done = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx = running.pop(fut)
+                for name, count in costs[idx].items():
+                    in_use[name] -= count
+                results[idx] = fut.result()
+                if on_done is not None:
+                    on_done(idx, results[idx])
+        return results
@@ -0,0 +1,353 @@
+"""
+Parse-once reader for the ASCII SDDS files written by OPALX (.stat, .smb).
+
+A file is read a single time into per-column arrays (numpy.ndarray when NumPy
+is installed, array('d') otherwise). Parsed files are cached by path, mtime and
+size, so every check, plot and report step of a simulation shares one parse.
+
+run_tests additionally stores a binary sidecar <file>.bin next to every
+exported stat file: a JSON header (columns, parameters, revision and the
+size/mtime/hash of the ASCII source) followed by the float64 columns, one
+after the other. load() memory-maps a valid sidecar and hands out views into
+the mapping, so later report builds do not parse the ASCII file at all.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import numpy as _np
+except ImportError:  # pragma: no cover - optional dependency
+    _np = None
+
+# Parsed files kept in memory; a simulation rarely has more than a few containers.
+_CACHE_SIZE = 32
+
+SIDECAR_SUFFIX = ".bin"
+_SIDECAR_MAGIC = b"SDDSCOL1"
+_SIDECAR_VERSION = 1
+
+_REVISION_RE = re.compile(r"(.* git rev\. )#([A-Za-z0-9]{7})[A-Za-z0-9]*")
+_FIELD_RE_CACHE: dict[str, Any] = {}
+
+
+def _field(block: str, key: str) -> str:
+    rx = _FIELD_RE_CACHE.get(key)
+    if rx is None:
+        rx = _FIELD_RE_CACHE[key] = re.compile(r"\b" + key + r"=([^,]*)")
+    m = rx.search(block)
+    return m.group(1).strip() if m else ""
+
+
+class StatData:
+    """
+    Contents of one SDDS file.
+    Member data:
+        - columns: {name: {"units", "column", "type"}} in file order
+        - parameters: {name: raw value line}
+        - revision: OPALX revision string (shortened git hash)
+        - nrows: number of complete data rows
+        - matrix: (columns x rows) float array when NumPy is available, else None
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: dict[str, dict] = {}
+        self.parameters: dict[str, str] = {}
+        self.revision = ""
+        self.nrows = 0
+        self.matrix: Optional[Any] = None
+        # Batched comparison results per reference file, filled by metrics.compare().
+        self.metrics_cache: dict[tuple, tuple] = {}
+        self._data: dict[str, Any] = {}
+        self._mmap: Optional[mmap.mmap] = None
+
+    def has(self, name: str) -> bool:
+        return name in self.columns
+
+    def units(self, name: str) -> str:
+        return self.columns.get(name, {}).get("units", "")
+
+    def column(self, name: str) -> Optional[Any]:
+        """
+        Values of column `name` (ndarray or array('d')), or None if there is no such column.
+        """
+        return self._data.get(name)
+
+
+def _as_columns(values: Any, ncols: int, nrows: int) -> tuple[list, Optional[Any]]:
+    if _np is not None:
+        # Column-major copy: every column is a contiguous row of the matrix,
+        # and all columns can be compared at once (see metrics).
+        mat = _np.asarray(values, dtype=float).reshape(nrows, ncols).T.copy()
+        return [mat[j] for j in range(ncols)], mat
+    return [values[j::ncols] for j in range(ncols)], None
+
+
+def _parse_rows(text: str, ncols: int) -> tuple[list, Optional[Any], int]:
+    tokens = text.split()
+    if ncols and tokens and len(tokens) % ncols == 0:
+        try:
+            values = _np.array(tokens, dtype=float) if _np is not None else array("d", map(float, tokens))
+            nrows = len(tokens) // ncols
+            return (*_as_columns(values, ncols, nrows), nrows)
+        except ValueError:
+            pass
+    # Slow path: a truncated last row (killed run) or non-numeric cells.
+    flat = array("d")
+    nrows = 0
+    for line in text.splitlines():
+        cells = line.split()
+        if len(cells) < ncols or not cells:
+            continue
+        for cell in cells[:ncols]:
+            try:
+                flat.append(float(cell))
+            except ValueError:
+                flat.append(float("nan"))
+        nrows += 1
+    return (*_as_columns(flat, ncols, nrows), nrows)
+
+
+def parse(path: str, raw: Optional[bytes] = None) -> StatData:
+    """
+    Read an ASCII SDDS file (header, one line per parameter, then data rows).
+    """
+    if raw is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+    text = raw.decode("utf-8", errors="replace")
+    data = StatData(path)
+
+    pos = 0
+    params: list[str] = []
+    end = len(text)
+    while pos < end:
+        nl = text.find("\n", pos)
+        nl = end if nl < 0 else nl
+        line = text[pos:nl]
+        stripped = line.lstrip()
+        if stripped.startswith(("&column", "&parameter", "&data")):
+            # Blocks may span several lines up to their "&end".
+            block_end = text.find("&end", pos)
+            if block_end < 0:
+                raise ValueError("%s: unterminated %s block" % (path, stripped.split()[0]))
+            block = text[pos:block_end]
+            nl = text.find("\n", block_end)
+            nl = end if nl < 0 else nl
+            if stripped.startswith("&column"):
+                name = _field(block, "name")
+                data.columns[name] = {
+                    "units": _field(block, "units"),
+                    "type": _field(block, "type"),
+                    "column": len(data.columns),
+                }
+            elif stripped.startswith("&parameter"):
+                params.append(_field(block, "name"))
+            else:
+                pos = nl + 1
+                break
+        pos = nl + 1
+
+    for name in params:
+        nl = text.find("\n", pos)
+        nl = end if nl < 0 else nl
+        data.parameters[name] = text[pos:nl].rstrip("\r")
+        pos = nl + 1
+
+    rev = data.parameters.get("revision", "")
+    m = _REVISION_RE.search(rev)
+    data.revision = m.group(1) + m.group(2) if m else rev
+
+    names = list(data.columns)
+    cols, data.matrix, data.nrows = _parse_rows(text[pos:], len(names))
+    data._data = dict(zip(names, cols))
+    return data
+
+
+def sidecar_path(path: str) -> str:
+    return path + SIDECAR_SUFFIX
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def write_sidecar(path: str) -> Optional[str]:
+    """
+    Write the binary sidecar of an ASCII SDDS file; returns its path, or None
+    if the file could not be read or the sidecar not be written.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        st = os.stat(path)
+        data = parse(path, raw)
+    except (OSError, ValueError):
+        return None
+    names = list(data.columns)
+    header = json.dumps(
+        {
+            "version": _SIDECAR_VERSION,
+            "source": {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "blake2b": _digest(raw)},
+            "columns": data.columns,
+            "parameters": data.parameters,
+            "revision": data.revision,
+            "names": names,
+            "nrows": data.nrows,
+        },
+        sort_keys=True,
+    ).encode("utf-8")
+    prefix = _SIDECAR_MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % 8)
+
+    out = sidecar_path(path)
+    tmp = out + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(prefix)
+            if data.matrix is not None:
+                f.write(data.matrix.astype("<f8", copy=False).tobytes())
+            else:
+                for name in names:
+                    col = data.column(name)
+                    if sys.byteorder != "little":
+                        col = array("d", col)
+                        col.byteswap()
+                    f.write(col.tobytes())
+        # Replace atomically: readers may still have the previous sidecar mapped.
+        os.replace(tmp, out)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        return None
+    return out
+
+
+def _sidecar_layout(mm: mmap.mmap, path: str, st: os.stat_result) -> Optional[tuple[dict, int]]:
+    """
+    (header, offset of the first column) of a mapped sidecar, or None if it
+    is not a valid, up-to-date sidecar for path (size and mtime, else content hash).
+    """
+    try:
+        if mm[:8] != _SIDECAR_MAGIC:
+            return None
+        (hlen,) = struct.unpack("<I", mm[8:12])
+        header = json.loads(mm[12:12 + hlen].decode("utf-8"))
+        offset = 12 + hlen + (-(12 + hlen) % 8)
+        nrows = int(header["nrows"])
+        source = header["source"]
+        if header.get("version") != _SIDECAR_VERSION or len(mm) != offset + 8 * nrows * len(header["names"]):
+            return None
+        if source["size"] != st.st_size:
+            return None
+        if source["mtime_ns"] != st.st_mtime_ns:
+            # Copied or touched: still valid if the content is the same.
+            with open(path, "rb") as f:
+                if _digest(f.read()) != source["blake2b"]:
+                    return None
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
+    return header, offset
+
+
+def _load_sidecar(path: str, st: os.stat_result) -> Optional[StatData]:
+    """
+    StatData backed by a memory-mapped sidecar, or None if there is no valid,
+    up-to-date sidecar for path.
+    """
+    if _np is None and sys.byteorder != "little":
+        return None
+    try:
+        with open(sidecar_path(path), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    layout = _sidecar_layout(mm, path, st)
+    if layout is None:
+        # Rejected sidecars are common (stale after a rerun); do not leave the mapping to the GC.
+        mm.close()
+        return None
+    header, offset = layout
+
+    data = StatData(path)
+    data.columns = header["columns"]
+    data.parameters = header["parameters"]
+    data.revision = header["revision"]
+    names = header["names"]
+    data.nrows = nrows = int(header["nrows"])
+    ncols = len(names)
+    if _np is not None:
+        mat = _np.frombuffer(mm, dtype="<f8", count=ncols * nrows, offset=offset).reshape(ncols, nrows)
+        data.matrix = mat
+        data._data = {name: mat[j] for j, name in enumerate(names)}
+    else:
+        flat = memoryview(mm)[offset:offset + 8 * ncols * nrows].cast("d")
+        data._data = {name: flat[j * nrows:(j + 1) * nrows] for j, name in enumerate(names)}
+    # Views into the mapping keep it alive; hold a reference for clarity.
+    data._mmap = mm
+    return data
+
+
+_cache: "OrderedDict[str, tuple[tuple[int, int], StatData]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_path_locks: dict[str, threading.Lock] = {}
+
+
+def load(path: str) -> StatData:
+    """
+    Parsed contents of path, re-read only when its mtime or size changed.
+    A valid sidecar is mapped instead of parsing the ASCII file. Concurrent
+    callers asking for the same file wait for a single parse.
+    """
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == stamp:
+            _cache.move_to_end(key)
+            return hit[1]
+        plock = _path_locks.setdefault(key, threading.Lock())
+    with plock:
+        with _cache_lock:
+            hit = _cache.get(key)
+            if hit is not None and hit[0] == stamp:
+                return hit[1]
+        data = _load_sidecar(key, st) or parse(key)
+        with _cache_lock:
+            _cache[key] = (stamp, data)
+            _cache.move_to_end(key)
+            while len(_cache) > _CACHE_SIZE:
+                old, _entry = _cache.popitem(last=False)
+                _path_locks.pop(old, None)
+    return data
+
+
+def set_cache_size(size: int) -> None:
+    """
+    Keep up to size parsed files in memory, e.g. for a long-running process
+    that sees the same reference files again and again.
+    """
+    global _CACHE_SIZE
+    with _cache_lock:
+        _CACHE_SIZE = max(1, int(size))
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+        _path_locks.clear()
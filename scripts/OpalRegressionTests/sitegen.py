@@ -1,14 +1,32 @@
+import hashlib
 import html
 import json
 import math
 import os
 import pathlib
+import re
+import shutil
 import datetime
 from collections import OrderedDict
 from typing import Optional
 
+from OpalRegressionTests import timings
 
 ASSETS_DIRNAME = "assets"
+# One small row per run (summary, build info, perf counts), validated by the
+# results.json mtime, so the overview never has to load full results files.
+RUNS_INDEX_FILENAME = "runs-index.json"
+_RUNS_INDEX_VERSION = 1
+# Runs shown on the landing page per column; all runs are on the month pages.
+_OVERVIEW_LATEST_RUNS = 30
+OVERVIEW_DIRNAME = "overview"
+_MONTH_RE = re.compile(r"^\d{4}-\d{2}")
+TRENDS_DIRNAME = "trends"
+# Bump whenever write_run_report() lays out run pages differently, so that
+# build_report rewrites the pages of recorded runs.
+RUN_PAGE_VERSION = 5
+# Per-simulation detail fragments of a run page, loaded when a simulation is opened.
+FRAGMENTS_DIRNAME = "fragments"
 
 
 def _write_text(path: str, content: str) -> None:
@@ -319,6 +337,20 @@ table.beammeta th{
   color: var(--muted);
   font-weight: 600;
 }
+table th.num, table td.num{
+  font-family: var(--mono);
+  font-size: 13px;
+  font-variant-numeric: tabular-nums;
+  text-align: right;
+  white-space: nowrap;
+}
+.sharebar{
+  display: inline-block;
+  height: 8px;
+  vertical-align: middle;
+  background: var(--link);
+  border-radius: 2px;
+}
 .containerhdr{
   margin: 16px 0 8px 0;
   font-size: 13px;
@@ -334,8 +366,17 @@ table.beammeta th{
 }
 .plotcard{ border: 1px solid var(--border); border-radius: 12px; overflow:hidden; background: var(--panel2); }
 .plotcard img{ width:100%; display:block; }
+.plotcard canvas{ width:100%; aspect-ratio: 16 / 10; display:block; }
 .plotcap{ padding: 8px 10px; font-size: 12px; color: var(--muted); font-family: var(--mono); }
 .footer{ margin-top: 22px; color: var(--muted); font-size: 12px; }
+.inner .loading{ color: var(--muted); font-size: 12px; padding: 6px 0; }
+details.archive{ margin-top: 12px; }
+details.archive > summary{ padding: 6px 0; color: var(--muted); font-size: 13px; }
+details.archive .months{ display:flex; flex-wrap:wrap; gap:8px; }
+svg.trend{ width:100%; height:auto; display:block; margin-top: 10px; }
+svg.trend .frame{ fill: var(--panel2); stroke: var(--border); }
+svg.trend .limit{ stroke: var(--broken); stroke-dasharray: 5 4; stroke-width: 1; }
+svg.trend .tick{ fill: var(--muted); font-size: 10px; font-family: var(--mono); }
 """
     _write_text(os.path.join(assets_dir, "style.css"), css.strip() + "\n")
 
@@ -343,19 +384,197 @@ table.beammeta th{
 function setupFilter(){
   const q = document.getElementById('q');
   if(!q) return;
-  const items = Array.from(document.querySelectorAll('[data-sim]'));
   const norm = s => (s||'').toLowerCase();
+  // Run pages carry a precomputed index (name, description, stat files, variables, states);
+  // older pages are filtered by their data-sim/data-desc attributes.
+  const index = document.getElementById('sim-index');
+  const items = index
+    ? JSON.parse(index.textContent).map(e => ({el: document.getElementById(e.id), hay: e.text})).filter(e => e.el)
+    : Array.from(document.querySelectorAll('[data-sim]')).map(el => ({
+        el, hay: norm(el.getAttribute('data-sim')) + ' ' + norm(el.getAttribute('data-desc'))
+      }));
   const apply = () => {
     const needle = norm(q.value);
-    for(const el of items){
-      const hay = norm(el.getAttribute('data-sim')) + ' ' + norm(el.getAttribute('data-desc'));
-      el.style.display = hay.includes(needle) ? '' : 'none';
+    for(const it of items){
+      it.el.style.display = it.hay.includes(needle) ? '' : 'none';
     }
   };
   q.addEventListener('input', apply);
   apply();
 }
 document.addEventListener('DOMContentLoaded', setupFilter);
+
+// Interactive plots: plots/<sim>/<stem>.plot.js calls rtPlotData(src, data) when loaded.
+// A <script> tag is used instead of fetch() so that reports also work from file://.
+const plotData = {};
+const plotWaiting = {};
+window.rtPlotData = function(src, data){
+  plotData[src] = data;
+  for(const cb of (plotWaiting[src] || [])) cb(data);
+  delete plotWaiting[src];
+};
+function loadPlotData(src, cb){
+  if(plotData[src]) return cb(plotData[src]);
+  if(plotWaiting[src]){ plotWaiting[src].push(cb); return; }
+  plotWaiting[src] = [cb];
+  const el = document.createElement('script');
+  el.src = src;
+  el.onerror = () => { delete plotWaiting[src]; };
+  document.head.appendChild(el);
+}
+function plotRange(lists){
+  let lo = Infinity, hi = -Infinity;
+  for(const vals of lists) for(const v of vals){
+    if(!isFinite(v)) continue;
+    if(v < lo) lo = v;
+    if(v > hi) hi = v;
+  }
+  if(lo === Infinity) return [0, 1];
+  if(lo === hi){ const d = Math.abs(lo) * 0.05 || 1; return [lo - d, hi + d]; }
+  const pad = (hi - lo) * 0.04;
+  return [lo - pad, hi + pad];
+}
+function plotPanel(ctx, box, series, xr, xlabel, ylabel, css){
+  const yr = plotRange(series.map(s => s.xy[1]));
+  const X = v => box.x + (v - xr[0]) / (xr[1] - xr[0]) * box.w;
+  const Y = v => box.y + box.h - (v - yr[0]) / (yr[1] - yr[0]) * box.h;
+  ctx.strokeStyle = css('--border'); ctx.lineWidth = 1;
+  ctx.strokeRect(box.x, box.y, box.w, box.h);
+  ctx.fillStyle = css('--muted'); ctx.font = '11px ' + css('--mono');
+  ctx.textAlign = 'right'; ctx.textBaseline = 'middle';
+  for(let i = 0; i <= 4; i++){
+    const v = yr[0] + (yr[1] - yr[0]) * i / 4;
+    ctx.fillText(v.toPrecision(3), box.x - 6, Y(v));
+  }
+  if(xlabel){
+    ctx.textAlign = 'center'; ctx.textBaseline = 'top';
+    for(let i = 0; i <= 5; i++){
+      const v = xr[0] + (xr[1] - xr[0]) * i / 5;
+      ctx.fillText(v.toPrecision(3), X(v), box.y + box.h + 4);
+    }
+    ctx.fillText(xlabel, box.x + box.w / 2, box.y + box.h + 20);
+  }
+  ctx.save();
+  ctx.translate(12, box.y + box.h / 2); ctx.rotate(-Math.PI / 2);
+  ctx.textAlign = 'center'; ctx.textBaseline = 'top';
+  ctx.fillText(ylabel, 0, 0);
+  ctx.restore();
+  ctx.save();
+  ctx.beginPath(); ctx.rect(box.x, box.y, box.w, box.h); ctx.clip();
+  for(const s of series){
+    const [xs, ys] = s.xy;
+    ctx.strokeStyle = s.color; ctx.lineWidth = 1.6; ctx.beginPath();
+    let pen = false;
+    for(let i = 0; i < xs.length; i++){
+      if(!isFinite(ys[i])){ pen = false; continue; }
+      if(pen) ctx.lineTo(X(xs[i]), Y(ys[i])); else ctx.moveTo(X(xs[i]), Y(ys[i]));
+      pen = true;
+    }
+    ctx.stroke();
+  }
+  ctx.restore();
+  let ly = box.y + 8;
+  ctx.textAlign = 'right'; ctx.textBaseline = 'middle';
+  for(const s of series){
+    if(!s.label) continue;
+    ctx.fillStyle = s.color; ctx.fillRect(box.x + box.w - 80, ly - 1, 14, 3);
+    ctx.fillStyle = css('--text'); ctx.textAlign = 'left';
+    ctx.fillText(s.label, box.x + box.w - 60, ly);
+    ly += 15;
+  }
+}
+function drawPlot(canvas, data){
+  const d = data.series[canvas.getAttribute('data-plot-var')];
+  if(!d) return;
+  const style = getComputedStyle(document.documentElement);
+  const css = name => style.getPropertyValue(name).trim();
+  const dpr = window.devicePixelRatio || 1;
+  const w = canvas.clientWidth, h = canvas.clientHeight;
+  canvas.width = Math.round(w * dpr); canvas.height = Math.round(h * dpr);
+  const ctx = canvas.getContext('2d');
+  ctx.scale(dpr, dpr);
+  const unit = u => (u ? ' [' + u + ']' : '');
+  const xlabel = d.x + unit(d.x_units);
+  const lists = [d.sim[0], d.ref[0]].concat(d.diff ? [d.diff[0]] : []);
+  const xr = plotRange(lists);
+  const left = 70, right = 12, top = 10, bottom = 42, gap = 14;
+  const inner = h - top - bottom - gap;
+  const mainH = d.diff ? inner * 0.75 : inner + gap;
+  plotPanel(ctx, {x: left, y: top, w: w - left - right, h: mainH}, [
+    {xy: d.sim, color: css('--link'), label: 'simulation'},
+    {xy: d.ref, color: css('--bad'), label: 'reference'},
+  ], xr, d.diff ? '' : xlabel, canvas.getAttribute('data-plot-var') + unit(d.units), css);
+  if(d.diff){
+    plotPanel(ctx, {x: left, y: top + mainH + gap, w: w - left - right, h: inner - mainH}, [
+      {xy: d.diff, color: css('--ok'), label: ''},
+    ], xr, xlabel, 'delta', css);
+  }
+}
+function drawPlots(root){
+  for(const c of root.querySelectorAll('canvas[data-plot-src]:not([data-drawn])')){
+    c.setAttribute('data-drawn', '1');
+    loadPlotData(c.getAttribute('data-plot-src'), data => drawPlot(c, data));
+  }
+}
+
+// Simulation details: fragments/<n>-<sim>.js calls rtSimFragment(src, html) when loaded.
+const fragmentTargets = {};
+window.rtSimFragment = function(src, html){
+  const inner = fragmentTargets[src];
+  if(!inner) return;
+  delete fragmentTargets[src];
+  inner.innerHTML = html;
+  drawPlots(inner);
+};
+function openSim(det){
+  const inner = det.querySelector('.inner[data-fragment]:not([data-loaded])');
+  if(!inner) return drawPlots(det);
+  inner.setAttribute('data-loaded', '1');
+  const src = inner.getAttribute('data-fragment');
+  fragmentTargets[src] = inner;
+  const el = document.createElement('script');
+  el.src = src;
+  el.onerror = () => { inner.textContent = 'Could not load ' + src; };
+  document.head.appendChild(el);
+}
+function setupPlots(){
+  for(const det of document.querySelectorAll('details.sim')){
+    det.addEventListener('toggle', () => { if(det.open) openSim(det); });
+  }
+}
+document.addEventListener('DOMContentLoaded', setupPlots);
+
+// Overview archive: overview/manifest.js calls rtOverviewManifest(data) with the month pages per source.
+function setupArchive(){
+  const boxes = Array.from(document.querySelectorAll('details.archive[data-manifest]'));
+  if(!boxes.length) return;
+  let requested = false;
+  window.rtOverviewManifest = function(data){
+    for(const box of boxes){
+      const list = box.querySelector('.months');
+      const months = data[box.getAttribute('data-source')] || [];
+      list.innerHTML = '';
+      for(const m of months){
+        const a = document.createElement('a');
+        a.className = 'linkbtn';
+        a.href = m.href;
+        a.textContent = m.title + ' (' + m.runs + (m.not_ok ? ', ' + m.not_ok + ' not ok' : '') + ')';
+        list.appendChild(a);
+      }
+      if(!months.length) list.textContent = 'No runs.';
+    }
+  };
+  for(const box of boxes){
+    box.addEventListener('toggle', () => {
+      if(!box.open || requested) return;
+      requested = true;
+      const el = document.createElement('script');
+      el.src = box.getAttribute('data-manifest');
+      document.head.appendChild(el);
+    });
+  }
+}
+document.addEventListener('DOMContentLoaded', setupArchive);
 """
     _write_text(os.path.join(assets_dir, "app.js"), js.strip() + "\n")
 
@@ -395,6 +614,209 @@ def _beam_cell_display(raw) -> tuple[str, str]:
         return s, s
 
 
+def _fmt_seconds(v) -> str:
+    if not isinstance(v, (int, float)):
+        return "—"
+    if v >= 3600:
+        return f"{v / 3600:.2f} h"
+    if v >= 60:
+        return f"{v / 60:.1f} min"
+    return f"{v:.2f} s"
+
+
+def _fmt_bytes(v) -> str:
+    if not isinstance(v, (int, float)):
+        return "—"
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(v) < 1024 or unit == "GiB":
+            return f"{v:.0f} {unit}" if unit == "B" else f"{v:.1f} {unit}"
+        v /= 1024.0
+    return "—"
+
+
+def _resources_table(results: dict) -> str:
+    """
+    One row per simulation with the resources measured by run_tests (see launcher.RunOutcome).
+    """
+    rows = []
+    for sim in results.get("simulations", []):
+        res = sim.get("resources")
+        if not res:
+            continue
+        rss = res.get("max_rss_kb")
+        wall = _escape(_fmt_seconds(res.get("wall_s")))
+        if res.get("timed_out"):
+            wall += " <span class='state broken'>timeout</span>"
+        perf = sim.get("perf") or {}
+        baseline = "—"
+        if isinstance(perf.get("baseline_median_s"), (int, float)):
+            baseline = "%s ± %s" % (_fmt_seconds(perf["baseline_median_s"]), _fmt_seconds(perf.get("baseline_mad_s")))
+        rows.append(
+            "<tr>"
+            f"<td class='simname'>{_escape(sim.get('name', ''))}</td>"
+            f"<td class='num'>{wall} {_perf_badge(perf)}</td>"
+            f"<td class='num'>{_escape(baseline)}</td>"
+            f"<td class='num'>{_escape(_fmt_seconds(res.get('user_s')))}</td>"
+            f"<td class='num'>{_escape(_fmt_seconds(res.get('sys_s')))}</td>"
+            f"<td class='num'>{_escape(_fmt_bytes(rss * 1024 if isinstance(rss, (int, float)) else None))}</td>"
+            f"<td class='num'>{_escape(_fmt_bytes(res.get('read_bytes')))}</td>"
+            f"<td class='num'>{_escape(_fmt_bytes(res.get('write_bytes')))}</td>"
+            f"<td class='num'>{_escape(_fmt_seconds(res.get('timeout_s')))}</td>"
+            "</tr>"
+        )
+    if not rows:
+        return ""
+    return (
+        "<table>"
+        "<thead><tr><th>Simulation</th><th class='num'>Wall</th><th class='num'>Baseline</th>"
+        "<th class='num'>User CPU</th><th class='num'>Sys CPU</th><th class='num'>Max RSS</th>"
+        "<th class='num'>Read</th><th class='num'>Written</th><th class='num'>Timeout</th></tr></thead>"
+        "<tbody>" + "".join(rows) + "</tbody>"
+        "</table>"
+    )
+
+
+def _fmt_timer(v) -> str:
+    if not isinstance(v, (int, float)):
+        return "—"
+    return "%.4g s" % v
+
+
+def _timings_table(sim: dict) -> str:
+    """
+    OPALX timer breakdown of one simulation (results.json "timings", see timings.py):
+    the main timer first, then the other timers by wall time with their share of it.
+    """
+    sim_timings = sim.get("timings") or {}
+    timers = [t for t in (sim_timings.get("timers") or []) if t.get("name")]
+    if not timers:
+        return ""
+    total = sim_timings.get("total_s")
+    main = [t for t in timers if t["name"] == timings.MAIN_TIMER]
+    rest = sorted(
+        (t for t in timers if t["name"] != timings.MAIN_TIMER),
+        key=lambda t: -(timings.wall(t) or 0.0),
+    )
+    rows = []
+    for t in main + rest:
+        wall = timings.wall(t)
+        share = ""
+        if isinstance(wall, (int, float)) and isinstance(total, (int, float)) and total > 0:
+            pct = 100.0 * wall / total
+            share = (
+                f"<span class='sharebar' style='width:{min(pct, 100.0):.1f}px'></span> {pct:.1f}%"
+            )
+        rows.append(
+            "<tr>"
+            f"<td class='simname'>{_escape(t['name'])}</td>"
+            f"<td class='num'>{_escape(_fmt_timer(wall))}</td>"
+            f"<td class='num'>{_escape(_fmt_timer(t.get('avg')))}</td>"
+            f"<td class='num'>{_escape(_fmt_timer(t.get('min')))}</td>"
+            f"<td class='simname'>{share}</td>"
+            "</tr>"
+        )
+    ranks = sim_timings.get("ranks")
+    return (
+        "<div class='beammeta-wrap'>"
+        f"<h4 class='containerhdr'>OPALX timers ({_escape(str(ranks))} rank(s))</h4>"
+        "<table class='beammeta'>"
+        "<thead><tr><th>Timer</th><th class='num'>Wall (max)</th><th class='num'>Wall (avg)</th>"
+        "<th class='num'>Wall (min)</th>"
+        f"<th>Share of {_escape(timings.MAIN_TIMER)}</th></tr></thead>"
+        "<tbody>" + "".join(rows) + "</tbody>"
+        "</table>"
+        "</div>"
+    )
+
+
+def _benchmark_row(label: str, stats: dict, fmt) -> str:
+    ci = stats.get("ci") or [None, None]
+    med = stats.get("median")
+    rel = "—"
+    if isinstance(med, (int, float)) and med > 0 and all(isinstance(v, (int, float)) for v in ci):
+        rel = "±%.1f%%" % (50.0 * (ci[1] - ci[0]) / med)
+    return (
+        f"<td class='simname'>{_escape(label)}</td>"
+        f"<td class='num'>{_escape(str(stats.get('n', '-')))}</td>"
+        f"<td class='num'>{_escape(fmt(med))}</td>"
+        f"<td class='num'>{_escape(fmt(stats.get('iqr')))}</td>"
+        f"<td class='num'>{_escape(fmt(ci[0]))} – {_escape(fmt(ci[1]))} ({_escape(rel)})</td>"
+        f"<td class='num'>{_escape(fmt(stats.get('min')))} – {_escape(fmt(stats.get('max')))}</td>"
+    )
+
+
+def _benchmark_table(results: dict) -> str:
+    """
+    Repeated-run statistics of the simulations run with --benchmark (results.json
+    "benchmark", see benchmark.py): wall time, then the OPALX timers by median.
+    """
+    rows = []
+    confidence = None
+    for sim in results.get("simulations", []):
+        bench = sim.get("benchmark")
+        if not bench or not bench.get("wall_s"):
+            continue
+        confidence = bench.get("confidence", confidence)
+        timers = [t for t in (bench.get("timers") or []) if t.get("name")]
+        main = [t for t in timers if t["name"] == timings.MAIN_TIMER]
+        rest = sorted((t for t in timers if t["name"] != timings.MAIN_TIMER), key=lambda t: -(t.get("median") or 0.0))
+        runs = "%s run(s), %s warm-up" % (bench.get("repeats", "-"), bench.get("warmup", 0))
+        if bench.get("failed"):
+            runs += ", <span class='state broken'>%d failed</span>" % bench["failed"]
+        entries = [("Wall time", bench["wall_s"], _fmt_seconds)] + [(t["name"], t, _fmt_timer) for t in main + rest]
+        for i, (label, stats, fmt) in enumerate(entries):
+            first = (
+                f"<td class='simname' rowspan='{len(entries)}'>{_escape(sim.get('name', ''))}"
+                f"<div class='desc'>{runs}</div></td>"
+            ) if i == 0 else ""
+            rows.append("<tr>" + first + _benchmark_row(label, stats, fmt) + "</tr>")
+    if not rows:
+        return ""
+    level = "%.0f%%" % (100.0 * confidence) if isinstance(confidence, (int, float)) else "CI"
+    return (
+        "<table>"
+        "<thead><tr><th>Simulation</th><th>Quantity</th><th class='num'>n</th><th class='num'>Median</th>"
+        f"<th class='num'>IQR</th><th class='num'>{_escape(level)} CI of median</th>"
+        "<th class='num'>Min – max</th></tr></thead>"
+        "<tbody>" + "".join(rows) + "</tbody>"
+        "</table>"
+    )
+
+
+def _perf_badge(perf: Optional[dict]) -> str:
+    """
+    Badge for a simulation flagged by perfcheck (slower/faster than its baseline); "" otherwise.
+    """
+    state = (perf or {}).get("state")
+    ratio = (perf or {}).get("ratio")
+    if state not in ("slower", "faster") or not isinstance(ratio, (int, float)):
+        return ""
+    cls = "bad" if state == "slower" else "ok"
+    title = "median %s ± MAD %s over %s earlier runs" % (
+        _fmt_seconds(perf.get("baseline_median_s")),
+        _fmt_seconds(perf.get("baseline_mad_s")),
+        perf.get("baseline_n", "-"),
+    )
+    return f"<span class='badge {cls}' title='{_escape(title)}'>{_escape(state)} {(ratio - 1.0) * 100:+.0f}%</span> "
+
+
+def _run_perf_badge(perf_summary: Optional[dict]) -> str:
+    """
+    Overview badge counting slower/faster simulations of a run; "" if none was flagged.
+    """
+    slower = (perf_summary or {}).get("slower", 0)
+    faster = (perf_summary or {}).get("faster", 0)
+    if not slower and not faster:
+        return ""
+    cls = "bad" if slower else "ok"
+    parts = []
+    if slower:
+        parts.append(f"slower:{slower}")
+    if faster:
+        parts.append(f"faster:{faster}")
+    return f"<span class='badge {cls}'>perf {_escape(' '.join(parts))}</span>"
+
+
 def _unit_badge(unit: dict) -> str:
     state = (unit or {}).get("state", "")
     if state == "passed":
@@ -444,6 +866,10 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
 
     unit_html = ""
     sims_html = []
+    # Compact filter index: one entry per card, matched by app.js instead of the DOM.
+    search_index = []
+    fragments_dir = os.path.join(run_dir, FRAGMENTS_DIRNAME)
+    shutil.rmtree(fragments_dir, ignore_errors=True)
     if unit:
         unit_state = unit.get("state", "not-run")
         unit_badge = _unit_badge(unit)
@@ -454,7 +880,7 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
         if unit.get("log_relpath"):
             unit_log_link = f"<a class='linkbtn' href='{_escape(unit.get('log_relpath'))}'>log</a>"
         unit_html = (
-            f"<details class='sim card' data-status='{unit_badge}' data-sim='unit-tests' data-desc='ctest -L unit'>"
+            f"<details class='sim card' id='unit-tests' data-status='{unit_badge}'>"
             "<summary>"
             "<div class='summary-left'>"
             "<div class='simname'>Unit tests</div>"
@@ -481,11 +907,13 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
             "</div>"
             "</details>"
         )
+        search_index.append({"id": "unit-tests", "text": "unit-tests unit tests ctest -l unit " + unit_state})
     for sim in results.get("simulations", []):
         simname = sim.get("name", "")
         desc = sim.get("description", "")
         if not simname and not desc and not sim.get("tests"):
             continue
+        sim_id = "sim-%d" % len(sims_html)
         counts = _count_states(sim)
         badge = "ok" if (counts["failed"] == 0 and counts["broken"] == 0) else ("broken" if counts["broken"] else "bad")
 
@@ -557,10 +985,13 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
             for t in group_tests:
                 var = t.get("var", "")
                 mode = t.get("mode", "")
+                if t.get("resample"):
+                    mode = f"{mode} (resampled on {t['resample']})"
                 eps = t.get("eps", "")
                 delta = t.get("delta", "")
                 state = t.get("state", "")
                 plot = t.get("plot")
+                plot_data = t.get("plot_data")
                 cap_stem = t.get("stat_stem") or simname
                 if cap_stem == "-":
                     cap_stem = simname
@@ -573,19 +1004,27 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
                     f"<td class='state {state}'>{_escape(state)}</td>"
                     "</tr>"
                 )
+                cap_line = (
+                    f"{simname} · {cap_stem} · {var}"
+                    if cap_stem != simname
+                    else f"{simname} · {var}"
+                )
                 if plot:
                     plot_rel = _escape(plot)
-                    cap_line = (
-                        f"{simname} · {cap_stem} · {var}"
-                        if cap_stem != simname
-                        else f"{simname} · {var}"
-                    )
                     plot_cards.append(
                         "<div class='plotcard'>"
                         f"<a href='{plot_rel}'><img loading='lazy' src='{plot_rel}' alt='plot'></a>"
                         f"<div class='plotcap'>{_escape(cap_line)}</div>"
                         "</div>"
                     )
+                elif plot_data:
+                    # Drawn by app.js when the simulation is opened.
+                    plot_cards.append(
+                        "<div class='plotcard'>"
+                        f"<canvas data-plot-src='{_escape(plot_data)}' data-plot-var='{_escape(var)}'></canvas>"
+                        f"<div class='plotcap'>{_escape(cap_line)}</div>"
+                        "</div>"
+                    )
             inner_blocks.append(
                 "<table>"
                 "<thead><tr><th>Variable</th><th>Mode</th><th>Eps</th><th>Delta</th><th>State</th></tr></thead>"
@@ -600,29 +1039,92 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
         if sim.get("log_relpath"):
             log_link = f"<a class='linkbtn' href='{_escape(sim.get('log_relpath'))}'>log</a>"
 
+        trend_href = os.path.relpath(
+            os.path.join(report_root, TRENDS_DIRNAME, _trend_page_name(simname)), run_dir
+        ).replace(os.sep, "/")
+        trend_link = f"<a class='linkbtn' href='{_escape(trend_href)}'>trend</a>"
+
         data_link = ""
         if sim.get("data_url"):
             data_link = f"<a class='linkbtn' href='{_escape(sim.get('data_url'))}'>data</a>"
 
+        wall_badge = ""
+        wall_s = (sim.get("resources") or {}).get("wall_s")
+        if isinstance(wall_s, (int, float)):
+            wall_badge = f"<span class='badge'>{_escape(_fmt_seconds(wall_s))}</span> "
+        wall_badge = _perf_badge(sim.get("perf")) + wall_badge
+
+        fragment_name = "%03d-%s.js" % (len(sims_html), re.sub(r"[^A-Za-z0-9._-]", "_", simname) or "sim")
+        fragment_src = f"{FRAGMENTS_DIRNAME}/{fragment_name}"
+        _write_text(
+            os.path.join(fragments_dir, fragment_name),
+            "rtSimFragment(%s,%s);\n"
+            % (json.dumps(fragment_src), json.dumps(beam_meta_html + _timings_table(sim) + "".join(inner_blocks))),
+        )
+        terms = [simname, desc, badge]
+        for t in sim.get("tests", []):
+            terms.extend(str(t.get(k) or "") for k in ("var", "mode", "state", "stat_stem"))
+        search_index.append({"id": sim_id, "text": " ".join(OrderedDict.fromkeys(x.lower() for x in terms if x))})
+
         sims_html.append(
-            f"<details class='sim card' data-status='{badge}' data-sim='{_escape(simname)}' data-desc='{_escape(desc)}'>"
+            f"<details class='sim card' id='{sim_id}' data-status='{badge}'>"
             "<summary>"
             "<div class='summary-left'>"
             f"<div class='simname'>{_escape(simname)}</div>"
             f"<div class='desc'>{_escape(desc)}</div>"
             "</div>"
             "<div class='summary-right'>"
-            f"<div><span class='badge {badge}'>passed:{counts['passed']} failed:{counts['failed']} broken:{counts['broken']}</span></div>"
-            f"<div class='links'>{log_link}{data_link}</div>"
+            f"<div>{wall_badge}<span class='badge {badge}'>passed:{counts['passed']} failed:{counts['failed']} broken:{counts['broken']}</span></div>"
+            f"<div class='links'>{log_link}{data_link}{trend_link}</div>"
             "</div>"
             "</summary>"
-            "<div class='inner'>"
-            + beam_meta_html +
-            "".join(inner_blocks) +
-            "</div>"
+            f"<div class='inner' data-fragment='{_escape(fragment_src)}'><div class='loading'>Loading…</div></div>"
             "</details>"
         )
 
+    perf_kv = ""
+    perf_summary = results.get("perf_summary")
+    if perf_summary:
+        perf_kv = (
+            "<div class='k'>Runtime vs. history</div><div class='v'>"
+            + _run_perf_badge(perf_summary)
+            + " "
+            + _escape(
+                "slower:%s faster:%s stable:%s no-baseline:%s (last %s runs of this configuration)"
+                % (
+                    perf_summary.get("slower", 0),
+                    perf_summary.get("faster", 0),
+                    perf_summary.get("stable", 0),
+                    perf_summary.get("no-baseline", 0),
+                    perf_summary.get("window", "-"),
+                )
+            )
+            + "</div>"
+        )
+
+    resources_html = _resources_table(results)
+    resources_card = ""
+    if resources_html:
+        resources_card = (
+            "<div class=\"card p\" style=\"margin-top:14px;\">"
+            "<div class=\"subtitle\">Simulation resources</div>"
+            "<div class=\"beammeta-wrap\" style=\"margin-top:10px;\">" + resources_html + "</div>"
+            "</div>"
+        )
+
+    benchmark_html = _benchmark_table(results)
+    benchmark_card = ""
+    if benchmark_html:
+        benchmark_card = (
+            "<div class=\"card p\" style=\"margin-top:14px;\">"
+            "<div class=\"subtitle\">Benchmark (repeated runs)</div>"
+            "<div class=\"beammeta-wrap\" style=\"margin-top:10px;\">" + benchmark_html + "</div>"
+            "</div>"
+        )
+
+    # Inline JSON: "</" must not close the script element.
+    search_json = json.dumps(search_index).replace("</", "<\\/")
+
     html_doc = f"""<!doctype html>
 <html lang="en">
 <head>
@@ -659,6 +1161,7 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
         <div class="kv">
           <div class="k">Build dir</div><div class="v">{_escape(build_dir)}</div>
           {''.join([f"<div class='k'>{_escape(k)}</div><div class='v'>{_escape(str(v))}</div>" for k,v in build_info.items()])}
+          {perf_kv}
         </div>
         <div class="footer" style="margin-top:14px;">
           Generated {html.escape(datetime.datetime.now().isoformat(timespec='seconds'))}
@@ -678,11 +1181,75 @@ def write_run_report(report_root: str, run_dir: str, results: dict) -> None:
         {''.join(sims_html) if sims_html else '<div class="subtitle">No regression simulations executed.</div>'}
       </div>
     </div>
+    {resources_card}
+    {benchmark_card}
   </div>
+  <script type="application/json" id="sim-index">{search_json}</script>
 </body>
 </html>
 """
     _write_text(os.path.join(run_dir, "index.html"), html_doc)
+    record_run(report_root, run_dir, results)
+
+
+def _runs_index_path(report_root: str) -> str:
+    return os.path.join(report_root, RUNS_INDEX_FILENAME)
+
+
+def _runs_index_key(report_root: str, run_dir: str) -> str:
+    return os.path.relpath(os.path.abspath(run_dir), os.path.abspath(report_root)).replace(os.sep, "/")
+
+
+def _load_runs_index(report_root: str) -> dict:
+    try:
+        with open(_runs_index_path(report_root), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == _RUNS_INDEX_VERSION and isinstance(data.get("runs"), dict):
+            return data
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": _RUNS_INDEX_VERSION, "runs": {}}
+
+
+def _save_runs_index(report_root: str, index: dict) -> None:
+    path = _runs_index_path(report_root)
+    tmp = path + ".tmp.%d" % os.getpid()
+    try:
+        pathlib.Path(report_root).mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _runs_index_row(results: dict, mtime: Optional[float]) -> dict:
+    summary = results.get("summary") or {}
+    build_info = (results.get("build") or {}).get("info") or {}
+    perf = results.get("perf_summary") or {}
+    return {
+        "mtime": mtime,
+        "summary": {k: summary.get(k, 0) for k in ("total", "passed", "failed", "broken")},
+        "unit_state": (results.get("unit_tests") or {}).get("state", ""),
+        "build": {k: build_info.get(k) or "" for k in ("Device", "Build Type", "Kokkos Architecture")},
+        "perf": {"slower": perf.get("slower", 0), "faster": perf.get("faster", 0)},
+    }
+
+
+def _results_mtime(run_dir: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(os.path.join(run_dir, "results.json"))
+    except OSError:
+        return None
+
+
+def record_run(report_root: str, run_dir: str, results: dict) -> None:
+    """
+    Store the overview row of one run in report/runs-index.json.
+    """
+    index = _load_runs_index(report_root)
+    index["runs"][_runs_index_key(report_root, run_dir)] = _runs_index_row(results, _results_mtime(run_dir))
+    _save_runs_index(report_root, index)
 
 
 def _list_run_entries(runs_dir: str) -> list[str]:
@@ -699,21 +1266,44 @@ def _list_run_entries(runs_dir: str) -> list[str]:
     return names
 
 
-def _build_run_cards(runs_dir: str, href_prefix: str) -> list[str]:
+def _indexed_runs(report_root: str, runs_dir: str, runs: list[str], index: dict) -> tuple[list[tuple[str, dict]], bool]:
+    """
+    (run name, index row) of the given runs of runs_dir; rows whose
+    results.json changed since they were recorded are re-read.
+    Returns the rows and whether the index was modified.
+    """
+    changed = False
+    rows: list[tuple[str, dict]] = []
+    for run in runs:
+        run_dir = os.path.join(runs_dir, run)
+        key = _runs_index_key(report_root, run_dir)
+        mtime = _results_mtime(run_dir)
+        row = index["runs"].get(key)
+        if row is None or row.get("mtime") != mtime:
+            try:
+                with open(os.path.join(run_dir, "results.json"), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            row = index["runs"][key] = _runs_index_row(data, mtime)
+            changed = True
+        rows.append((run, row))
+    return rows, changed
+
+
+def _run_badge(row: dict) -> str:
+    s = row.get("summary") or {}
+    return "ok" if (s.get("failed", 0) == 0 and s.get("broken", 0) == 0) else ("broken" if s.get("broken", 0) else "bad")
+
+
+def _build_run_cards(rows: list[tuple[str, dict]], href_prefix: str) -> list[str]:
     cards: list[str] = []
-    for run in _list_run_entries(runs_dir)[:200]:
-        rpath = os.path.join(runs_dir, run, "results.json")
-        try:
-            with open(rpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            continue
-        s = (data.get("summary") or {})
-        unit = (data.get("unit_tests") or {})
-        build_info = (data.get("build") or {}).get("info") or {}
+    for run, row in rows:
+        build_info = row.get("build") or {}
         run_disp = _format_ts_for_display(run)
-        badge = "ok" if (s.get("failed", 0) == 0 and s.get("broken", 0) == 0) else ("broken" if s.get("broken", 0) else "bad")
-        unit_badge = _unit_badge(unit)
+        badge = _run_badge(row)
+        unit_badge = _unit_badge({"state": row.get("unit_state", "")})
+        perf_badge = _run_perf_badge(row.get("perf"))
 
         # Build architecture pills: Device, Build Type, Kokkos Architecture
         build_parts = []
@@ -738,13 +1328,113 @@ def _build_run_cards(runs_dir: str, href_prefix: str) -> list[str]:
             f"<div style='display:flex; gap:10px; align-items:center; flex-wrap:wrap;'>"
             f"{arch_pill}"
             f"<span class='badge {badge}'>reg</span>"
-            f"<span class='badge {unit_badge}'>unit</span></div>"
+            f"<span class='badge {unit_badge}'>unit</span>"
+            f"{perf_badge}</div>"
             "</div>"
             "</a>"
         )
     return cards
 
 
+def _run_month(run: str) -> str:
+    return run[:7] if _MONTH_RE.match(run) else "undated"
+
+
+def _month_title(month: str) -> str:
+    try:
+        return datetime.datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+    except ValueError:
+        return month
+
+
+def _month_page(title: str, cards: list[str]) -> str:
+    return f"""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>OPALX regression report · {_escape(title)}</title>
+  <link rel="stylesheet" href="../{ASSETS_DIRNAME}/style.css">
+</head>
+<body>
+  <div class="wrap">
+    <div class="topbar">
+      <div>
+        <div class="title">{_escape(title)}</div>
+        <div class="subtitle">{len(cards)} runs · <a href="../index.html">overview</a></div>
+      </div>
+    </div>
+    <div class="card p"><div class="runlist" style="display:grid; gap:10px;">{''.join(cards)}</div></div>
+  </div>
+</body>
+</html>
+"""
+
+
+def _update_month_pages(report_root: str, source: str, label: str, runs_dir: str, rows: list, runs_index: dict) -> list[dict]:
+    """
+    Write overview/<source>-<YYYY-MM>.html for every month whose runs changed
+    (content signature kept in the runs index) and remove pages of months
+    without runs. Returns the manifest entries of source, newest month first.
+    """
+    overview_dir = os.path.join(report_root, OVERVIEW_DIRNAME)
+    href = os.path.relpath(runs_dir, overview_dir).replace(os.sep, "/").rstrip("/") + "/"
+    months: "OrderedDict[str, list]" = OrderedDict()
+    for run, row in rows:
+        months.setdefault(_run_month(run), []).append((run, row))
+
+    pages = runs_index.setdefault("pages", {})
+    entries = []
+    live = set()
+    for month, month_rows in months.items():
+        name = f"{source}-{month}.html"
+        live.add(name)
+        path = os.path.join(overview_dir, name)
+        sig = hashlib.blake2b(json.dumps([href, month_rows], sort_keys=True).encode("utf-8"), digest_size=12).hexdigest()
+        if pages.get(name) != sig or not os.path.isfile(path):
+            _write_text(path, _month_page(f"{label} · {_month_title(month)}", _build_run_cards(month_rows, href)))
+            pages[name] = sig
+        entries.append(
+            {
+                "month": month,
+                "title": _month_title(month),
+                "href": f"{OVERVIEW_DIRNAME}/{name}",
+                "runs": len(month_rows),
+                "not_ok": sum(1 for _run, row in month_rows if _run_badge(row) != "ok"),
+            }
+        )
+    for name in [n for n in pages if n.startswith(source + "-") and n not in live]:
+        try:
+            os.unlink(os.path.join(overview_dir, name))
+        except OSError:
+            pass
+        del pages[name]
+    return entries
+
+
+def _write_if_changed(path: str, content: str) -> bool:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    _write_text(path, content)
+    return True
+
+
+def _archive_box(source: str, total: int) -> str:
+    if total <= 0:
+        return ""
+    shown = min(total, _OVERVIEW_LATEST_RUNS)
+    return (
+        f"<details class='archive' data-source='{_escape(source)}' data-manifest='{OVERVIEW_DIRNAME}/manifest.js'>"
+        f"<summary>Latest {shown} of {total} runs · all runs by month</summary>"
+        "<div class='months'></div>"
+        "</details>"
+    )
+
+
 def update_overview(report_root: str, runs_dir: Optional[str] = None, runs_remote_dir: Optional[str] = None) -> None:
     nightlybuildx_dir = os.path.dirname(os.path.abspath(report_root))
     local_runs_dir = os.path.abspath(runs_dir) if runs_dir else os.path.join(nightlybuildx_dir, "runs")
@@ -752,8 +1442,32 @@ def update_overview(report_root: str, runs_dir: Optional[str] = None, runs_remot
     local_href = os.path.relpath(local_runs_dir, report_root).rstrip("/") + "/"
     remote_href = os.path.relpath(remote_runs_dir, report_root).rstrip("/") + "/"
 
-    local_cards = _build_run_cards(local_runs_dir, local_href)
-    remote_cards = _build_run_cards(remote_runs_dir, remote_href)
+    runs_index = _load_runs_index(report_root)
+    pages_before = dict(runs_index.get("pages") or {})
+    local_runs = _list_run_entries(local_runs_dir)
+    remote_runs = _list_run_entries(remote_runs_dir)
+    local_rows, local_changed = _indexed_runs(report_root, local_runs_dir, local_runs, runs_index)
+    remote_rows, remote_changed = _indexed_runs(report_root, remote_runs_dir, remote_runs, runs_index)
+    existing = {_runs_index_key(report_root, os.path.join(local_runs_dir, run)) for run in local_runs}
+    existing.update(_runs_index_key(report_root, os.path.join(remote_runs_dir, run)) for run in remote_runs)
+    stale = [k for k in runs_index["runs"] if k not in existing]
+    for k in stale:
+        del runs_index["runs"][k]
+
+    # Full history: one page per month and source; only changed months are rewritten.
+    manifest = {
+        "runs": _update_month_pages(report_root, "runs", "Local runs", local_runs_dir, local_rows, runs_index),
+        "runs_remote": _update_month_pages(report_root, "runs_remote", "Remote runs", remote_runs_dir, remote_rows, runs_index),
+    }
+    _write_if_changed(
+        os.path.join(report_root, OVERVIEW_DIRNAME, "manifest.js"),
+        "rtOverviewManifest(%s);\n" % json.dumps(manifest, sort_keys=True),
+    )
+    if local_changed or remote_changed or stale or runs_index.get("pages") != pages_before:
+        _save_runs_index(report_root, runs_index)
+
+    local_cards = _build_run_cards(local_rows[:_OVERVIEW_LATEST_RUNS], local_href)
+    remote_cards = _build_run_cards(remote_rows[:_OVERVIEW_LATEST_RUNS], remote_href)
 
     local_body = (
         "".join(local_cards)
@@ -785,6 +1499,7 @@ def update_overview(report_root: str, runs_dir: Optional[str] = None, runs_remot
       <div style="display:flex; gap:10px; flex-wrap:wrap; align-items:center; justify-content:flex-end;">
         <div class="pill"><span class="dot ok"></span><a href="{_escape(local_href)}">runs/</a></div>
         <div class="pill"><span class="dot ok"></span><a href="{_escape(remote_href)}">runs_remote/</a></div>
+        <div class="pill"><span class="dot ok"></span><a href="{TRENDS_DIRNAME}/index.html">trends/</a></div>
       </div>
     </div>
     <div class="card p">
@@ -793,10 +1508,12 @@ def update_overview(report_root: str, runs_dir: Optional[str] = None, runs_remot
         <div class="landing-col">
           <div class="coltitle">Local runs</div>
           <div class="runlist">{local_body}</div>
+          {_archive_box("runs", len(local_rows))}
         </div>
         <div class="landing-col">
           <div class="coltitle">Remote runs</div>
           <div class="runlist">{remote_body}</div>
+          {_archive_box("runs_remote", len(remote_rows))}
         </div>
       </div>
       <div class="footer">Updated {html.escape(datetime.datetime.now().isoformat(timespec='seconds'))}</div>
@@ -807,3 +1524,223 @@ def update_overview(report_root: str, runs_dir: Optional[str] = None, runs_remot
 """
     _write_text(os.path.join(report_root, "index.html"), index)
 
+
+
+# Line colours of the build configurations on trend pages (cycled).
+_TREND_COLORS = ("#60a5fa", "#f59e0b", "#22c55e", "#ef4444", "#a78bfa", "#14b8a6", "#f472b6", "#94a3b8")
+
+
+def _trend_page_name(simname: str) -> str:
+    return simname.replace(os.sep, "_") + ".html"
+
+
+def _svg_chart(series: list, n_x: int, y_max: float, threshold: Optional[float] = None) -> str:
+    """
+    Inline SVG line chart. series: [(colour, [(x index, y, tooltip, href), ...]), ...]
+    with x in [0, n_x); y is drawn linearly from 0 to y_max.
+    """
+    w, h = 760, 170
+    left, right, top, bottom = 56, 10, 10, 20
+    pw, ph = w - left - right, h - top - bottom
+    y_max = y_max if y_max > 0 else 1.0
+
+    def X(i):
+        return left + (pw * i / (n_x - 1) if n_x > 1 else pw / 2)
+
+    def Y(v):
+        return top + ph - ph * min(max(v, 0.0), y_max) / y_max
+
+    out = [
+        f"<svg class='trend' viewBox='0 0 {w} {h}' role='img'>",
+        f"<rect x='{left}' y='{top}' width='{pw}' height='{ph}' class='frame'/>",
+    ]
+    for frac in (0.0, 0.5, 1.0):
+        v = y_max * frac
+        out.append(f"<text x='{left - 6}' y='{Y(v):.1f}' class='tick' text-anchor='end' dominant-baseline='middle'>{_escape('%.3g' % v)}</text>")
+    if threshold is not None and threshold <= y_max:
+        out.append(f"<line x1='{left}' x2='{left + pw}' y1='{Y(threshold):.1f}' y2='{Y(threshold):.1f}' class='limit'/>")
+        out.append(f"<text x='{left + pw - 4}' y='{Y(threshold) - 4:.1f}' class='tick' text-anchor='end'>eps</text>")
+    for color, points in series:
+        if not points:
+            continue
+        coords = " ".join(f"{X(i):.1f},{Y(v):.1f}" for i, v, _tip, _href in points)
+        out.append(f"<polyline points='{coords}' fill='none' stroke='{color}' stroke-width='1.6'/>")
+        for i, v, tip, href in points:
+            dot = (
+                f"<circle cx='{X(i):.1f}' cy='{Y(v):.1f}' r='2.6' fill='{color}'>"
+                f"<title>{_escape(tip)}</title></circle>"
+            )
+            out.append(f"<a href='{_escape(href)}'>{dot}</a>" if href else dot)
+    out.append("</svg>")
+    return "".join(out)
+
+
+def _trend_page(simname: str, checks: list, runtimes: list, run_href) -> str:
+    runs = sorted({(r["run"], r["source"]) for r in list(checks) + list(runtimes)})
+    x_of = {key: i for i, key in enumerate(runs)}
+    configs = sorted({r["config"] or "-" for r in list(checks) + list(runtimes)})
+    color_of = {cfg: _TREND_COLORS[i % len(_TREND_COLORS)] for i, cfg in enumerate(configs)}
+    legend = "".join(
+        f"<span class='pill'><span class='dot' style='background:{color_of[cfg]}'></span>{_escape(cfg)}</span>"
+        for cfg in configs
+    )
+
+    blocks = []
+    wall_series = OrderedDict((cfg, []) for cfg in configs)
+    wall_max = 0.0
+    for r in runtimes:
+        if r["wall_s"] is None or r["timed_out"]:
+            continue
+        wall_max = max(wall_max, r["wall_s"])
+        tip = f"{r['run']} · {r['config']} · {_fmt_seconds(r['wall_s'])}"
+        wall_series[r["config"] or "-"].append((x_of[(r["run"], r["source"])], r["wall_s"], tip, run_href(r["source"], r["run"])))
+    if wall_max > 0:
+        blocks.append(
+            "<div class='card p' style='margin-top:14px;'>"
+            "<div class='subtitle'>Runtime (wall time)</div>"
+            + _svg_chart([(color_of[c], pts) for c, pts in wall_series.items()], len(runs), wall_max * 1.1)
+            + "</div>"
+        )
+
+    groups: "OrderedDict[tuple, OrderedDict]" = OrderedDict()
+    for r in checks:
+        key = (r["stat_stem"] or simname, r["var"], r["mode"])
+        groups.setdefault(key, OrderedDict((cfg, []) for cfg in configs))[r["config"] or "-"].append(r)
+    for (stem, var, mode), per_cfg in sorted(groups.items()):
+        series = []
+        y_max = 1.0
+        latest = []
+        eps_seen = set()
+        for cfg, rows in per_cfg.items():
+            pts = []
+            for r in rows:
+                if r["delta"] is None or not r["eps"]:
+                    continue
+                ratio = r["delta"] / r["eps"]
+                eps_seen.add(r["eps"])
+                y_max = max(y_max, ratio)
+                tip = f"{r['run']} · {cfg} · {r['state']} · delta={r['delta']:.4g} eps={r['eps']:.4g} ({ratio:.3g} eps)"
+                pts.append((x_of[(r["run"], r["source"])], ratio, tip, run_href(r["source"], r["run"])))
+            series.append((color_of[cfg], pts))
+            if rows:
+                last = rows[-1]
+                badge = {"passed": "ok", "failed": "bad"}.get(last["state"], "broken")
+                latest.append(
+                    f"<span class='badge {badge}' title='{_escape(cfg)} · {_escape(last['run'])}'>"
+                    f"<span class='dot' style='display:inline-block; background:{color_of[cfg]}'></span> "
+                    f"{_escape(last['state'] or '-')}</span>"
+                )
+        eps_txt = ", ".join("%.4g" % e for e in sorted(eps_seen)) or "-"
+        header = f"{stem} · {var}" if stem != simname else var
+        blocks.append(
+            "<div class='card p' style='margin-top:14px;'>"
+            "<div style='display:flex; justify-content:space-between; gap:10px; flex-wrap:wrap;'>"
+            f"<div class='simname'>{_escape(header)} <span class='desc'>({_escape(mode)}, eps={_escape(eps_txt)}, delta/eps)</span></div>"
+            f"<div style='display:flex; gap:6px; flex-wrap:wrap;'>{''.join(latest)}</div>"
+            "</div>"
+            # Ratios far above eps would flatten everything else; clip the axis at 3x eps.
+            + _svg_chart(series, len(runs), min(y_max * 1.05, 3.0), threshold=1.0)
+            + "</div>"
+        )
+
+    return f"""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>OPALX trends · {_escape(simname)}</title>
+  <link rel="stylesheet" href="../{ASSETS_DIRNAME}/style.css">
+</head>
+<body>
+  <div class="wrap">
+    <div class="topbar">
+      <div>
+        <div class="title">{_escape(simname)}</div>
+        <div class="subtitle">History of {len(runs)} runs · <a href="index.html">all simulations</a> · <a href="../index.html">overview</a></div>
+      </div>
+    </div>
+    <div class="card p"><div class="toolbar" style="margin-top:0;">{legend}</div></div>
+    {''.join(blocks) if blocks else '<div class="subtitle">No history yet.</div>'}
+    <div class="footer">Updated {html.escape(datetime.datetime.now().isoformat(timespec='seconds'))}</div>
+  </div>
+</body>
+</html>
+"""
+
+
+def update_trends(report_root: str, nightlybuildx_dir: Optional[str] = None) -> int:
+    """
+    Sync the results database (see resultsdb) and rewrite the trend pages
+    report/trends/<simname>.html of the simulations whose history changed,
+    plus report/trends/index.html. Returns the number of pages written.
+    """
+    from OpalRegressionTests import resultsdb
+
+    nightlybuildx_dir = nightlybuildx_dir or os.path.dirname(os.path.abspath(report_root))
+    trends_dir = os.path.join(report_root, TRENDS_DIRNAME)
+    pathlib.Path(trends_dir).mkdir(parents=True, exist_ok=True)
+    db_path = resultsdb.default_path(report_root)
+    changed = resultsdb.sync(db_path, nightlybuildx_dir)
+
+    def run_href(source: str, run: str) -> str:
+        target = os.path.join(nightlybuildx_dir, source, run, "index.html")
+        return os.path.relpath(target, trends_dir).replace(os.sep, "/")
+
+    conn = resultsdb.connect(db_path)
+    try:
+        overview = resultsdb.simulation_overview(conn)
+        names = {row["name"] for row in overview}
+        # Pages that do not exist yet (new report root) are written as well.
+        todo = {n for n in names if n in changed or not os.path.isfile(os.path.join(trends_dir, _trend_page_name(n)))}
+        for simname in sorted(todo):
+            page = _trend_page(
+                simname,
+                resultsdb.check_history(conn, simname),
+                resultsdb.runtime_history(conn, simname),
+                run_href,
+            )
+            _write_text(os.path.join(trends_dir, _trend_page_name(simname)), page)
+        for simname in changed - names:
+            try:
+                os.unlink(os.path.join(trends_dir, _trend_page_name(simname)))
+            except OSError:
+                pass
+    finally:
+        conn.close()
+
+    rows = "".join(
+        "<tr>"
+        f"<td class='simname'><a href='{_escape(_trend_page_name(row['name']))}'>{_escape(row['name'])}</a></td>"
+        f"<td class='simname'>{row['runs']}</td>"
+        f"<td class='simname'>{_escape(row['last_run'] or '')}</td>"
+        "</tr>"
+        for row in overview
+    )
+    index = f"""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>OPALX regression trends</title>
+  <link rel="stylesheet" href="../{ASSETS_DIRNAME}/style.css">
+</head>
+<body>
+  <div class="wrap">
+    <div class="topbar">
+      <div>
+        <div class="title">Regression test trends</div>
+        <div class="subtitle">delta/eps and runtime per simulation across runs · <a href="../index.html">overview</a></div>
+      </div>
+    </div>
+    <div class="card p">
+      <table>
+        <thead><tr><th>Simulation</th><th>Runs</th><th>Last run</th></tr></thead>
+        <tbody>{rows}</tbody>
+      </table>
+    </div>
+  </div>
+</body>
+</html>
+"""
+    _write_text(os.path.join(trends_dir, "index.html"), index)
+    return len(todo)
@@ -1,12 +1,42 @@
 #!/usr/bin/python3
 
 import os
-import re
 import math
+import threading
 
+from OpalRegressionTests import metrics, plotting, sdds
 from OpalRegressionTests.reporter import Reporter
 from OpalRegressionTests.reporter import TempXMLElement
 
+# pyplot keeps global state; serialize figure creation across concurrently running tests.
+_PLOT_LOCK = threading.Lock()
+
+
+def parse_check_options(tokens):
+    """
+    parse the optional fields after the tolerance of a "stat" line in a .rt file:
+        stat "rms_x" avg 1e-5 resample      compare on a common s grid
+        stat "rms_x" avg 1e-5 resample=t    compare on a common t grid
+    everything from a "#" token on is a comment; unknown options are reported
+    and ignored. returns a dict of StatTest keyword arguments, raises ValueError
+    for an unsupported resample axis
+    """
+    options = {}
+    # The fields come from split(" "): re-split so stray blanks and "\r" of CRLF files vanish.
+    for token in " ".join(tokens).split():
+        if token.startswith("#"):
+            break
+        key, _sep, value = token.partition("=")
+        if key == "resample":
+            axis = value or "s"
+            if axis not in metrics.RESAMPLE_AXES:
+                raise ValueError("unsupported resample axis %r" % axis)
+            options["resample"] = axis
+        else:
+            Reporter().appendReport("WARNING: ignoring unknown stat test option %r\n" % token)
+    return options
+
+
 class StatTest:
     """
     A regression test based on ASCII SDDS format for beam statistics
@@ -16,21 +46,37 @@ class StatTest:
     Member data:
         - var: the variable to be checked.
         - quant: string that defines how the variable should be handled.
-          Options are "last" and "avg"
-        - eps: floating point tolerance (absolute)
+          Options are "last", "avg", "rms", "max", "error" and "all"
+          (see metrics.py)
+        - eps: floating point tolerance (absolute; relative for "error")
         - name: name of the smb file to be checked
+        - resample: None, or the axis ("s"/"t") on which simulation and
+          reference are interpolated before comparing (files of different length)
+        - plotter: optional plotting.PlotPool; plots are then rendered asynchronously
+        - plot_cache: optional plotting.PlotCache; figures with an unchanged key are not redrawn
+        - reference_dir: directory of the reference file (default: <prefix>/reference)
+        - plot_dir: directory the figure is written to (default: prefix)
     """
 
-    def __init__(self, var, quant, eps, prefix, name, suffix = ".stat", plot_dirname=None, generate_plot=True):
+    def __init__(self, var, quant, eps, prefix, name, suffix = ".stat", plot_dirname=None, generate_plot=True,
+                 resample=None, plotter=None, plot_cache=None, reference_dir=None, plot_dir=None):
         self.var = var
         self.quant = quant
+        self.resample = resample
+        self.plotter = plotter
+        self.plot_future = None
+        self.plot_cache = plot_cache
+        self.plot_key = None
         self.eps = eps
         self.prefix = prefix
         self.name = name
         self.plot_dirname = plot_dirname if plot_dirname is not None else name
         self.generate_plot = generate_plot
+        self.plot_dir = plot_dir if plot_dir is not None else prefix
         self.fname = os.path.join(self.prefix, self.name) + suffix
-        self.reference_fname = os.path.join(self.prefix, "reference", self.name) + suffix
+        if reference_dir is None:
+            reference_dir = os.path.join(self.prefix, "reference")
+        self.reference_fname = os.path.join(reference_dir, self.name) + suffix
         
     def _report_broken_test(self, root):
         passed_report = TempXMLElement("state")
@@ -54,6 +100,8 @@ class StatTest:
             "plot": None,
             "stat_stem": self.name,
         }
+        if self.resample:
+            self.last_result["resample"] = self.resample
         return False
         
     def checkResult(self, root):
@@ -71,16 +119,21 @@ class StatTest:
             rep.appendReport("ERROR: no statfile %s \n" % self.name)
             rep.appendReport("\t Test %s(%s) broken \n" % (self.var,self.quant))
             return self._report_broken_test(root)
-            
+
+        if not os.path.isfile(self.reference_fname):
+            rep.appendReport("ERROR: no reference statfile %s \n" % self.name)
+            rep.appendReport("\t Test %s(%s) broken \n" % (self.var,self.quant))
+            return self._report_broken_test(root)
+
         self.opalRevision, self.path_length, self.values = self._readStatVariable(self.fname)
         self.refRevision, self.ref_path_length, self.ref_values = self._readStatVariable(self.reference_fname)
 
-        if self.values == [] or self.ref_values == []:
+        if self.values is None or self.ref_values is None or len(self.values) == 0 or len(self.ref_values) == 0:
             rep.appendReport("Error: unknown variable (%s) selected for stat test\n" % self.var)
             rep.appendReport("\t Test %s(%s) broken: %s (eps=%s) \n" % (self.var,self.quant,val,self.eps))
             return self._report_broken_test(root)
 
-        if len(self.values) != len(self.ref_values):
+        if not self.resample and len(self.values) != len(self.ref_values):
             rep.appendReport("Error: size of stat variables (%s) dont agree!\n" % self.var)
             rep.appendReport("       size reference: %d, size simulation: %d\n" % (
                 len(self.ref_values), len(self.values)))
@@ -89,23 +142,17 @@ class StatTest:
             return self._report_broken_test(root)
 
 
-        if self.quant == "last":
-            val = abs(self.values[-1] - self.ref_values[-1])
-
-        elif self.quant == "avg":
-            sum = 0.0
-            for i in range(len(self.values)):
-                sum += (self.values[i] - self.ref_values[i])**2
-            val = (sum)**(0.5) / len(self.values)
-
-        elif self.quant == "error":
-            rep.appendReport("TODO: error norm\n")
-
-        elif self.quant == "all":
-            rep.appendReport("TODO: graph/all\n")
-
-        else:
+        val = metrics.compare(sdds.load(self.fname), sdds.load(self.reference_fname),
+                              self.var, self.quant, resample_axis=self.resample)
+        if val is None and self.resample and self.quant in metrics.MODES:
+            rep.appendReport("Error: cannot resample %s on %s (missing/unsorted axis or no overlap)\n" % (
+                self.var, self.resample))
+            rep.appendReport("\t Test %s(%s) broken \n" % (self.var,self.quant))
+            return self._report_broken_test(root)
+        if val is None:
             rep.appendReport("Error: unknown quantity %s \n" % self.quant)
+            rep.appendReport("\t Test %s(%s) broken \n" % (self.var,self.quant))
+            return self._report_broken_test(root)
 
         #result generation
         passed_report = TempXMLElement("state")
@@ -149,183 +196,54 @@ class StatTest:
             "plot": (plot_rel.format(self.plot_dirname) if plot_rel else None),
             "stat_stem": self.name,
         }
+        if plot_rel and self.plot_key:
+            self.last_result["plot_key"] = self.plot_key
+        if self.resample:
+            self.last_result["resample"] = self.resample
 
         return passed
 
-    def _readStatHeader(self, statfile):
+    def _readStatVariable(self, fname):
         """
-        parse header of .stat file (ASCII SDDS format)
+        returns (revision, s, values) of self.var from a stat-file; values is
+        None if the variable is not a column of the file. The file is parsed
+        once and shared with every other check of the same file (sdds.load).
         """
-        header = {'number of lines': 0,
-                  'columns': {},
-                  'parameters': {}
-        }
-        numColumns = 0
-        numScalars = 0
-        readLines = 0
-        with open(statfile, "r") as infile:
-            lines = [line.rstrip('\n') for line in infile]
-
-        i = 0
-        end_of_header_reached = False
-        while not end_of_header_reached:
-            line = lines[i]
-
-            if "&column" in line:
-                column = ""
-                while True:
-                    column += line
-                    if "&end" in line:
-                        break
-                    i += 1
-                    line = lines[i]
-
-                name = str.split(column, "name=")[1]
-                name = str.split(name, ",")[0]
-                unit = str.split(column, "units=")[1]
-                unit = str.split(unit, ",")[0]
-
-                header['columns'][name] = {'units': unit, 'column': len(header['columns'])}
-                numColumns += 1
-
-            elif "&parameter" in line:
-                parameter = ""
-                while True:
-                    parameter += line
-                    if "&end" in line:
-                        break
-                    i += 1
-                    line = lines[i]
-
-                name = str.split(parameter, "name=")[1]
-                name = str.split(name, ",")[0]
-
-                header['parameters'][name] = {'row': len(header['parameters'])}
+        data = sdds.load(fname)
+        self.s_unit = data.units('s')
+        if not data.has(self.var):
+            return data.revision, data.column('s'), None
+        self.var_unit = data.units(self.var)
+        return data.revision, data.column('s'), data.column(self.var)
 
-            elif "&data" in line:
-                while not "&end" in line:
-                    i += 1
-                    line = lines[i]
-                end_of_header_reached = True
-
-            i += 1
-
-        header['number of lines'] = i
-
-        return header
-
-    def _readStatVariable(self, fname):
+    def _plot(self):
         """
-        method parses a stat-file and returns found variables
+        render (or, with a plotter, submit) the comparison figure; returns the
+        path of the PNG. A submitted figure's future is kept in self.plot_future.
         """
-        header = self._readStatHeader(fname)
-        readLines = header['number of lines']
-        revLine = header['parameters']['revision']['row']
-        numScalars = len(header['parameters'])
-        sCol = header['columns']['s']['column']
-        self.s_unit = header['columns'].get('s', {}).get('units', '')
-        
-        varCol = -1
-        if self.var in header['columns']:
-            varData = header['columns'][self.var]
-            varCol = varData['column']
-            self.var_unit = varData.get('units', '')
-        else:
-            return []
-        with open(fname,"r") as infile:
-            lines = [line.rstrip('\n') for line in infile]
-    
-        m = re.search(r'(.* git rev\. )#([A-Za-z0-9]{7})[A-Za-z0-9]*', lines[readLines + revLine])
-        if m:
-            revision = m.group(1) + m.group(2)
-        else:
-            revision = lines[readLines + revLine]
-
-        path_length = [float(line.split()[sCol]) for line in lines[(readLines + numScalars):]]
-        values = [float(line.split()[varCol]) for line in lines[(readLines + numScalars):]]
-        return revision, path_length, values
-
-    def _read_stat_file(self, stat_file, plot_file):
-        header = self._readStatHeader(stat_file)
-        readLines = header['number of lines']
-        revLine = header['parameters']['revision']['row']
-        numScalars = len(header['parameters'])
-        sCol = header['columns']['s']['column']
-
-        varCol = -1
-        if self.var in header['columns']:
-            varData = header['columns'][self.var]
-            varCol = varData['column']
-            self.var_unit = varData['units']
+        output_fname = os.path.join(self.plot_dir, self.name + "_" + self.var + ".png")
+        job = plotting.PlotJob(self.fname, self.reference_fname, self.var, self.name,
+                               output_fname, self.resample)
+        self.plot_key = plotting.plot_key(job)
+        if self.plot_cache is not None and self.plot_cache.hit(os.path.basename(output_fname), self.plot_key):
+            # An identical figure is already in the report's plot directory.
+            return output_fname
+        if self.plotter is not None:
+            try:
+                self.plot_future = self.plotter.submit(job)
+                return output_fname
+            except RuntimeError:
+                # Pool shut down or broken (BrokenProcessPool): render inline instead.
+                self.plotter = None
 
-        if varCol == -1:
-            print ("Error in genplot: Cannot find stat variable!")
-            return False
-
-        stat_data = [line.rstrip('\n') for line in open(stat_file)]
-
-        m = re.search(r'(.* git rev\. )#([A-Za-z0-9]{7})[A-Za-z0-9]*', stat_data[readLines + revLine])
-        if m:
-            revision = m.group(1) + m.group(2)
-        else:
-            revision = stat_data[readLines + revLine]
-
-        with open(plot_file,'w') as f:
-            for line in stat_data[(readLines + numScalars):]:
-                values = line.split()
-                f.write(values[sCol] + "\t" + values[varCol] + "\n")
-
-        return revision
-
-    def _plot(self):
         # Matplotlib is intentionally imported lazily to keep startup fast and
         # to provide a clearer error if it's not installed.
         try:
-            import matplotlib
-            matplotlib.use("Agg")
-            import matplotlib.pyplot as plt
-            plt.style.use("bmh")
+            plt = plotting.import_pyplot()
         except Exception as e:
             rep = Reporter()
             rep.appendReport(f"ERROR: matplotlib not available ({e})\n")
             return ""
 
-        _opalRevision, s1, y1 = self._readStatVariable(self.fname)
-        _refRevision, s2, y2 = self._readStatVariable(self.reference_fname)
-        if not s1 or not s2 or len(s1) != len(s2):
-            return ""
-
-        # Compute difference (generated - reference)
-        diff = [a - b for a, b in zip(y1, y2)]
-
-        varParts = str.split(self.var, "_")
-        prettyVar = varParts[0]
-        if len(varParts) == 2:
-            prettyVar = varParts[0] + "(" + varParts[1] + ")"
-
-        output_fname = os.path.join(self.prefix, self.name + "_" + self.var + ".png")
-
-        var_unit = getattr(self, "var_unit", "").strip()
-        s_unit = getattr(self, "s_unit", "").strip()
-
-        # Use constrained layout to avoid tight_layout warnings with shared axes/gridspec.
-        fig = plt.figure(figsize=(10.5, 6.5), dpi=140, constrained_layout=True)
-        gs = fig.add_gridspec(2, 1, height_ratios=[3, 1], hspace=0.12)
-        ax = fig.add_subplot(gs[0, 0])
-        ax2 = fig.add_subplot(gs[1, 0], sharex=ax)
-
-        ax.plot(s1, y1, lw=1.8, label="simulation")
-        ax.plot(s2, y2, lw=1.8, label="reference")
-        ax.set_ylabel(f"{prettyVar} [{var_unit}]" if var_unit else prettyVar)
-        ax.legend(loc="upper right", fontsize=8)
-        ax.set_title(self.name)
-
-        ax2.plot(s1, diff, lw=1.6, label="difference")
-        ax2.axhline(0.0, lw=1.0, color="black", alpha=0.4)
-        ax2.set_xlabel(f"s [{s_unit}]" if s_unit else "s")
-        ax2.set_ylabel(f"delta [{var_unit}]" if var_unit else "delta")
-
-        fig.savefig(output_fname)
-        plt.close(fig)
-
-        return output_fname
+        with _PLOT_LOCK:
+            return plotting.render(plt, job)
@@ -0,0 +1,95 @@
+"""
+OPALX timer summaries ("Timings>" lines at the end of a simulation log).
+
+At exit OPALX prints one entry per IPPL timer: the main timer with its total
+wall time, every other timer with max / avg / min wall time over the ranks.
+
+    Timings>      Timing results for 4 rank(s):
+    Timings> mainTimer........... Wall tot =    19.4006
+    Timings> Write Stat.......... Wall max =    5.22811
+    Timings>                      Wall avg =    5.22811
+    Timings>                      Wall min =    5.22811
+
+Only the tail of the log is read, so this stays cheap for large debug logs.
+The result is stored per simulation as results.json "timings":
+
+    {"ranks": 4, "total_s": 19.4006,
+     "timers": [{"name": "mainTimer", "tot": 19.4006},
+                {"name": "Write Stat", "max": 5.22, "avg": 5.22, "min": 5.22}, ...]}
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Optional
+
+_PREFIX = "Timings>"
+_HEADER_RE = re.compile(r"Timing results for (\d+) rank")
+# Name padded with dots to a fixed width; continuation lines have no name.
+_ENTRY_RE = re.compile(r"^Timings>\s(.*?)\.*\s*Wall (tot|max|avg|min)\s*=\s*(\S+)\s*$")
+# The timer table is a few KB; read more only if the header is not in the tail.
+_TAIL_SIZES = (256 * 1024, 4 * 1024 * 1024)
+MAIN_TIMER = "mainTimer"
+
+
+def parse_timings(log_tail: str) -> Optional[dict]:
+    """
+    The last timer summary in log_tail, or None if there is none.
+    """
+    header = None
+    for header in _HEADER_RE.finditer(log_tail):
+        pass
+    if header is None:
+        return None
+    timers: list[dict] = []
+    for line in log_tail[header.end():].splitlines():
+        if not line.startswith(_PREFIX):
+            continue
+        m = _ENTRY_RE.match(line)
+        if not m:
+            continue
+        name, stat, value = m.group(1).strip(), m.group(2), m.group(3)
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        if name:
+            timers.append({"name": name})
+        elif not timers:
+            continue
+        timers[-1][stat] = seconds
+    if not timers:
+        return None
+    main = next((t for t in timers if t["name"] == MAIN_TIMER), None)
+    return {
+        "ranks": int(header.group(1)),
+        "total_s": (main.get("tot", main.get("max")) if main else None),
+        "timers": timers,
+    }
+
+
+def load_timings_from_out(out_path: str) -> Optional[dict]:
+    """
+    Timer summary at the end of a simulation log, or None.
+    """
+    if not out_path or not os.path.isfile(out_path):
+        return None
+    try:
+        with open(out_path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            for tail in _TAIL_SIZES:
+                f.seek(max(0, size - tail))
+                text = f.read().decode("utf-8", errors="replace")
+                if _HEADER_RE.search(text) or tail >= size:
+                    return parse_timings(text)
+    except OSError:
+        return None
+    return None
+
+
+def wall(timer: dict) -> Optional[float]:
+    """
+    Wall time of a timer for breakdowns: the maximum over ranks, or the total.
+    """
+    return timer.get("max", timer.get("tot"))
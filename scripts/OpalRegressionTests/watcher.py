@@ -0,0 +1,185 @@
+"""
+Change notification for the run directories of build_report --watch.
+
+RunWatcher reports which run directories below runs/ and runs_remote/ may have
+changed. On Linux it uses inotify (through ctypes, no extra packages): the two
+base directories are watched for runs appearing or disappearing, and every run
+directory for files being written or moved into it. Elsewhere, when inotify is
+not available, or on request (network file systems do not deliver inotify
+events for writes made on other hosts) it falls back to polling.
+
+The watcher only narrows down where to look; deciding whether a run is
+complete and stable is left to the caller.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from typing import Optional
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_BASE_MASK = _IN_CREATE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE | _IN_ONLYDIR
+_RUN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY | _IN_ATTRIB | _IN_DELETE_SELF | _IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class _Inotify:
+    """
+    Minimal inotify binding: add_watch() and read() of raw events.
+    """
+
+    def __init__(self):
+        name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(name, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "%s: %s" % (path, os.strerror(err)))
+        return wd
+
+    def read(self, timeout: Optional[float]) -> list[tuple[int, int, str]]:
+        """
+        (watch descriptor, mask, name) of the pending events; waits up to timeout seconds.
+        """
+        ready, _w, _x = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, pos)
+            pos += _EVENT.size
+            name = os.fsdecode(buf[pos:pos + length].rstrip(b"\0"))
+            pos += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class RunWatcher:
+    """
+    Watches base directories (runs/, runs_remote/) whose subdirectories are runs.
+    """
+
+    def __init__(self, bases: list[str], poll: bool = False, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.bases = [os.path.abspath(b) for b in bases]
+        self.poll_interval = poll_interval
+        self._inotify: Optional[_Inotify] = None
+        self._wd_paths: dict[int, str] = {}
+        self._wd_bases: set[int] = set()
+        if not poll:
+            try:
+                self._inotify = _Inotify()
+                for base in self.bases:
+                    wd = self._inotify.add_watch(base, _BASE_MASK)
+                    self._wd_paths[wd] = base
+                    self._wd_bases.add(wd)
+                    for run_dir in self._list_runs(base):
+                        self._watch_run(run_dir)
+            except (OSError, AttributeError):
+                # No inotify (not Linux, no libc symbol, watch limit reached).
+                self.close()
+                self._inotify = None
+        self._known = set(self.run_dirs())
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    @staticmethod
+    def _list_runs(base: str) -> list[str]:
+        try:
+            names = sorted(os.listdir(base))
+        except OSError:
+            return []
+        return [os.path.join(base, n) for n in names if os.path.isdir(os.path.join(base, n))]
+
+    def run_dirs(self) -> list[str]:
+        dirs: list[str] = []
+        for base in self.bases:
+            dirs.extend(self._list_runs(base))
+        return dirs
+
+    def _watch_run(self, run_dir: str) -> None:
+        try:
+            wd = self._inotify.add_watch(run_dir, _RUN_MASK)
+        except OSError as e:
+            if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise
+        self._wd_paths[wd] = run_dir
+
+    def wait(self, timeout: Optional[float] = None) -> set[str]:
+        """
+        Run directories that may have been created, changed or removed; waits
+        up to timeout seconds (None: until something happens).
+        """
+        if self._inotify is None:
+            interval = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+            time.sleep(max(0.0, interval))
+            current = set(self.run_dirs())
+            # Removed runs, plus every present run: the caller compares file stamps.
+            changed = (self._known - current) | current
+            self._known = current
+            return changed
+        changed: set[str] = set()
+        for wd, mask, name in self._inotify.read(timeout):
+            if mask & _IN_Q_OVERFLOW:
+                # Events were dropped: look at everything, and watch runs we missed.
+                for run_dir in self.run_dirs():
+                    if run_dir not in self._wd_paths.values():
+                        self._watch_run(run_dir)
+                    changed.add(run_dir)
+                continue
+            path = self._wd_paths.get(wd)
+            if path is None:
+                continue
+            if mask & _IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+            if wd in self._wd_bases:
+                if not name:
+                    continue
+                run_dir = os.path.join(path, name)
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and mask & _IN_ISDIR:
+                    self._watch_run(run_dir)
+                changed.add(run_dir)
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
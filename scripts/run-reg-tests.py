@@ -6,8 +6,16 @@ import shutil
 import argparse
 
 import OpalRegressionTests
+from OpalRegressionTests import history, plotting
 from OpalRegressionTests.console_theme import Theme
-from OpalRegressionTests.regressiontest import discover_stat_stems
+from OpalRegressionTests.regressiontest import (
+    DEFAULT_ECHO_RATE,
+    DEFAULT_TIMEOUT_S,
+    _parse_cmake_cache,
+    _select_build_info,
+    discover_stat_stems,
+)
+from OpalRegressionTests.scheduler import parse_slots
 
 """
 Scan given directory for regression tests. Regression tests are stored
@@ -23,12 +31,9 @@ Regression tests must follow the following directory-layouts:
 
 """
 def scan_for_tests (dir):
-    # Switch to the directory containing regression tests
-    os.chdir (dir)
-
     tests = set ()
-    # Iterate through all entries in the directory
-    with os.scandir ('.') as it:
+    # Iterate through all entries in the directory containing regression tests
+    with os.scandir (dir) as it:
         for entry in it:
             # Skip hidden directories (starting with .) or entries that are not directories
             if entry.name.startswith('.') or not entry.is_dir():
@@ -36,19 +41,20 @@ def scan_for_tests (dir):
 
             # check if all files required are available
             test = entry.name
-            basename = os.path.join (test, test)
+            test_dir = os.path.join (dir, test)
+            basename = os.path.join (test_dir, test)
 
             # A valid test requires:
             # 1. An input file (<name>.in)
             # 2. A 'reference' subdirectory with at least one matching *.stat
-            ref_dir = os.path.join(test, "reference")
+            ref_dir = os.path.join(test_dir, "reference")
             if not (os.path.isfile(basename + ".in") and os.path.isdir(ref_dir)):
                 continue
             if not discover_stat_stems(os.path.abspath(ref_dir), test):
                 continue
 
             # Check if a 'disabled' file exists to skip this test
-            if os.path.isfile(os.path.join(test, "disabled")):
+            if os.path.isfile(os.path.join(test_dir, "disabled")):
                 continue
                 
             tests.add (test)
@@ -101,6 +107,53 @@ def main(argv):
     parser.add_argument('--raw-data-dir',
                         dest='raw_data_dir', type=str,
                         help='directory where raw per-test outputs are copied')
+    parser.add_argument('--jobs', '-j',
+                        dest='jobs', type=int, default=None,
+                        help='maximum number of tests run concurrently (default: 1, or limited by --slots only)')
+    parser.add_argument('--slots',
+                        dest='slots', type=str, default=None,
+                        help='resource capacity shared by concurrent tests, e.g. cpu=64,gpu=4; '
+                             'per-test costs come from <test>.slots or the .local script')
+    parser.add_argument('--echo-rate',
+                        dest='echo_rate', type=float, default=DEFAULT_ECHO_RATE,
+                        help='max. simulation output lines per second echoed to the console '
+                             '(0 = unlimited, default: %(default)s); the full output is always in <test>-RT.o')
+    parser.add_argument('--no-echo',
+                        dest='echo', action='store_false',
+                        help='do not echo simulation output to the console')
+    parser.add_argument('--history-dir',
+                        dest='history_dir', type=str, default=None,
+                        help='NightlyBuildX directory whose runs/ and runs_remote/ provide per-test runtime history')
+    parser.add_argument('--history-runs',
+                        dest='history_runs', type=int, default=30,
+                        help='number of most recent runs considered as history (default: %(default)s)')
+    parser.add_argument('--order',
+                        dest='order', choices=('history', 'name'), default='history',
+                        help='launch order: longest expected runtime first (history) or alphabetical (name); '
+                             'results are always reported alphabetically (default: %(default)s)')
+    parser.add_argument('--failing-first',
+                        dest='failing_first', action='store_true',
+                        help='launch tests that failed in the most recent run first')
+    parser.add_argument('--timeout',
+                        dest='timeout', type=float, default=DEFAULT_TIMEOUT_S,
+                        help='wall-clock limit per test in seconds; also the upper bound of adaptive timeouts '
+                             '(default: %(default)s)')
+    parser.add_argument('--timeout-factor',
+                        dest='timeout_factor', type=float, default=3.0,
+                        help='per-test timeout = factor * p95 of historical runtimes of the same build '
+                             'configuration (0 disables; default: %(default)s)')
+    parser.add_argument('--plot-workers',
+                        dest='plot_workers', type=int, default=plotting.DEFAULT_WORKERS,
+                        help='processes rendering comparison plots (0 = render inline; default: %(default)s)')
+    parser.add_argument('--benchmark',
+                        dest='benchmark', type=int, default=0, metavar='N',
+                        help='run each test N times and record median, IQR and bootstrap confidence '
+                             'interval of wall time and OPALX timers; only the first run is compared '
+                             'with the references (default: off)')
+    parser.add_argument('--warmup',
+                        dest='warmup', type=int, default=0, metavar='M',
+                        help='--benchmark: unmeasured runs of each test before the measured ones '
+                             '(default: %(default)s)')
 
     # Support passing tests after a literal "--" (run_tests uses this)
     if "--" in argv:
@@ -121,6 +174,20 @@ def main(argv):
     else:
         base_dir = os.getcwd()
     T = Theme()
+    try:
+        slots = parse_slots(args.slots)
+    except ValueError as e:
+        print(T.red("--slots: %s" % e))
+        sys.exit(1)
+    if args.jobs is not None and args.jobs < 0:
+        print(T.red("--jobs must not be negative"))
+        sys.exit(1)
+    if args.benchmark < 0 or args.warmup < 0:
+        print(T.red("--benchmark and --warmup must not be negative"))
+        sys.exit(1)
+    if args.warmup and not args.benchmark:
+        print(T.red("--warmup requires --benchmark"))
+        sys.exit(1)
     if not os.path.isdir (base_dir):
         print(T.red("%s - regression tests base directory does not exist!" % (base_dir)))
         sys.exit(1)
@@ -157,19 +224,48 @@ def main(argv):
                 print(T.red("%s - unknown test!" % (test)))
                 sys.exit(1)
         tests = sorted(args.tests)
+    if args.benchmark and len(tests) > 1 and ((args.jobs or 0) > 1 or (not args.jobs and slots)):
+        sys.stderr.write("WARNING: --benchmark with concurrent tests; timings include their contention\n")
+
+    build_dir = os.path.abspath(args.build_dir) if args.build_dir else None
+
+    # Runtime history: launch order and per-test timeouts
+    hist = []
+    if args.history_dir:
+        hist = history.load_history(os.path.abspath(args.history_dir), max_runs=args.history_runs)
+    config = None
+    if build_dir:
+        config = history.config_key(_select_build_info(_parse_cmake_cache(os.path.join(build_dir, "CMakeCache.txt"))))
+    schedule = list(tests)
+    if args.order == 'history':
+        schedule = history.schedule_order(tests, hist, config=config, failing_first=args.failing_first)
+    elif args.failing_first:
+        schedule = sorted(tests, key=lambda t: not history.last_failed(hist, t))
+    timeouts = {}
+    expected = {}
+    for test in tests:
+        # Timeouts only trust runtimes of the same build configuration.
+        samples = history.durations(hist, test, config) if config else []
+        timeouts[test] = history.adaptive_timeout(samples, default=args.timeout, factor=args.timeout_factor)
+        if samples:
+            expected[test] = history.percentile(samples, 50)
 
     print()
     print(T.rule())
     print(T.s("Regression tests", "1", "36") + T.dim("  ({} cases)".format(len(tests))))
+    if args.benchmark:
+        print(T.dim("Benchmark: {} measured run(s), {} warm-up run(s) per test".format(args.benchmark, args.warmup)))
     print(T.rule())
-    for i, test in enumerate(tests, 1):
-        print("  " + T.dim("{:>3}.".format(i)) + "  " + T.s(test, "1"))
+    for i, test in enumerate(schedule, 1):
+        info = ""
+        if test in expected:
+            info = T.dim("  ~{:.0f} s, timeout {:.0f} s".format(expected[test], timeouts[test]))
+        print("  " + T.dim("{:>3}.".format(i)) + "  " + T.s(test, "1") + info)
     print(T.rule())
     print()
     
     plots_dir = os.path.abspath(args.plots_dir) if args.plots_dir else None
     logs_dir = os.path.abspath(args.logs_dir) if args.logs_dir else None
-    build_dir = os.path.abspath(args.build_dir) if args.build_dir else None
     unit_tests_summary = os.path.abspath(args.unit_tests_summary) if args.unit_tests_summary else None
     raw_data_dir = os.path.abspath(args.raw_data_dir) if args.raw_data_dir else None
     report_root = os.path.abspath(args.report_root) if args.report_root else None
@@ -188,6 +284,15 @@ def main(argv):
         execution_only=args.execution_only,
         raw_data_dir=raw_data_dir,
         report_root=report_root,
+        jobs=args.jobs,
+        slots=slots,
+        echo=args.echo,
+        echo_rate=args.echo_rate,
+        schedule=schedule,
+        timeouts=timeouts,
+        plot_workers=args.plot_workers,
+        benchmark_repeats=args.benchmark,
+        benchmark_warmup=args.warmup,
     )
     rt.run()
 